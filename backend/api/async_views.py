@@ -0,0 +1,417 @@
+"""
+Async counterparts of the record CRUD and prediction views.
+
+These are meant to be served by an ASGI server (see backend/asgi.py). MongoDB
+is queried through the async driver, so a single worker can wait on many slow
+queries at once, and CPU-bound forecasting runs in worker threads so it never
+stalls the event loop.
+
+Under WSGI, Django runs every async view on a new event loop, which would give
+each request its own AsyncMongoClient and connection pool. Those requests are
+handed to the sync view of the same endpoint instead, which uses the shared client.
+"""
+import asyncio
+import json
+import logging
+from functools import wraps
+from asgiref.sync import sync_to_async
+from bson import ObjectId
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+from django.core.handlers.asgi import ASGIRequest
+from django.http import HttpResponse, JsonResponse
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_GET, require_http_methods
+from linearregression_predictiveanalysis import get_predictions_async, create_async, create_many_async, connect_to_mongodb_async, notify_data_changed_async
+from linearregression_predictiveanalysis import current_data_version_async, current_model_version, forecast_cache, get_predictions_multi_async
+from peertopeer import get_peer_to_prediction_records, connect_to_mongodb_peertopeer_async, peertopeer_data_version_async, notify_peertopeer_changed_async, forecast_source_signature
+from recommendations import connect_to_mongodb_recommendation_async, recommendation_data_version_async, notify_recommendation_changed_async
+from tracing import span
+from api.projection import parse_fields
+from api.etags import make_etag, request_etag, conditional_response_async
+from api import views
+from api.views import build_update_pipeline, clean_update_data, parse_year, bulk_write_errors, bulk_update_response, split_bulk_items, bulk_insert_result, bulk_insert_failed, parse_chunk_size, parse_targets
+
+# Configure the logger
+logger = logging.getLogger(__name__)
+
+def wsgi_fallback(sync_view):
+    """
+    Serve requests that did not come through ASGI with `sync_view`, the sync view
+    of the same endpoint, so the per-loop async client is only created under ASGI.
+    """
+    def decorator(view):
+        @wraps(view)
+        async def wrapper(request, *args, **kwargs):
+            if isinstance(request, ASGIRequest):
+                return await view(request, *args, **kwargs)
+            return await sync_to_async(sync_view)(request, *args, **kwargs)
+        return wrapper
+    return decorator
+
+@wsgi_fallback(views.get_renewable_energy_predictions)
+@require_GET
+async def get_renewable_energy_predictions(request, target):
+    """
+    API endpoint to get renewable energy predictions for a specific target.
+    """
+    try:
+        start_year = int(request.GET.get('start_year') or 2024)
+        end_year = int(request.GET.get('end_year') or 2040)
+
+        logger.debug(f"Received request for target: {target}, start_year: {start_year}, end_year: {end_year}")
+
+        with span('mongo.version'):
+            cache_key = (await current_data_version_async(), current_model_version(), target, start_year, end_year)
+
+        async def build():
+            # Serve repeated queries from the response cache while the data is unchanged
+            body = forecast_cache.get(cache_key)
+            if body is not None:
+                return HttpResponse(body, content_type='application/json')
+
+            predictions = await get_predictions_async(target, start_year, end_year)
+
+            with span('serialize'):
+                # Convert the DataFrame to a dictionary for JSON response
+                predictions_dict = predictions.to_dict(orient='records')
+
+                response = JsonResponse({
+                    'status': 'success',
+                    'target': target,
+                    'predictions': predictions_dict
+                })
+            forecast_cache.set(cache_key, response.content)
+            return response
+
+        return await conditional_response_async(request, make_etag('predictions', *cache_key), build)
+    except Exception as e:
+        logger.error(f"Error in get_renewable_energy_predictions: {e}")
+        return JsonResponse({
+            'status': 'error',
+            'message': str(e)
+        }, status=500)
+
+@wsgi_fallback(views.get_all_renewable_energy_predictions)
+@require_GET
+async def get_all_renewable_energy_predictions(request):
+    """
+    API endpoint to get predictions for several renewable energy targets at once.
+    """
+    try:
+        start_year = int(request.GET.get('start_year') or 2024)
+        end_year = int(request.GET.get('end_year') or 2040)
+        targets = parse_targets(request)
+
+        logger.debug(f"Received request for targets: {targets}, start_year: {start_year}, end_year: {end_year}")
+
+        with span('mongo.version'):
+            cache_key = (await current_data_version_async(), current_model_version(), tuple(targets), start_year, end_year)
+
+        async def build():
+            # Serve repeated queries from the response cache while the data is unchanged
+            body = forecast_cache.get(cache_key)
+            if body is not None:
+                return HttpResponse(body, content_type='application/json')
+
+            forecasts = await get_predictions_multi_async(targets, start_year, end_year)
+
+            with span('serialize'):
+                response = JsonResponse({
+                    'status': 'success',
+                    'start_year': start_year,
+                    'end_year': end_year,
+                    'predictions': {target: forecast.to_dict(orient='records') for target, forecast in forecasts.items()}
+                })
+            forecast_cache.set(cache_key, response.content)
+            return response
+
+        return await conditional_response_async(request, make_etag('predictions-multi', *cache_key), build)
+    except ValueError as e:
+        return JsonResponse({
+            'status': 'error',
+            'message': str(e)
+        }, status=400)
+    except Exception as e:
+        logger.error(f"Error in get_all_renewable_energy_predictions: {e}")
+        return JsonResponse({
+            'status': 'error',
+            'message': str(e)
+        }, status=500)
+
+@wsgi_fallback(views.peertopeer_predictions)
+@require_GET
+async def peertopeer_predictions(request):
+    """
+    API endpoint to get predictions based on year.
+    """
+    try:
+        year = int(request.GET.get('year') or 2026)
+
+        logger.debug(f"Received request with year: {year}")
+
+        # The forecast only changes with the workbook it is built from
+        etag = make_etag('peertopeer', forecast_source_signature(), year)
+
+        async def build():
+            # The forecast is pure CPU work, so keep it off the event loop
+            predictions_dict = await asyncio.to_thread(get_peer_to_prediction_records, year)
+
+            with span('serialize'):
+                return JsonResponse({
+                    'status': 'success',
+                    'predictions': predictions_dict
+                })
+
+        return await conditional_response_async(request, etag, build)
+    except Exception as e:
+        logger.error(f"Error in peertopeer_predictions: {e}")
+        return JsonResponse({
+            'status': 'error',
+            'message': str(e)
+        }, status=500)
+
+@wsgi_fallback(views.CreateView.as_view())
+@csrf_exempt
+@require_http_methods(["POST"])
+async def create_record(request):
+    """
+    API endpoint to insert actual data, or a JSON array of it, into MongoDB.
+    """
+    try:
+        data = json.loads(request.body)
+        if isinstance(data, list):
+            try:
+                chunk_size = parse_chunk_size(request)
+            except ValueError as e:
+                return JsonResponse({'status': 'error', 'message': str(e)}, status=400)
+
+            positions, errors = split_bulk_items(data)
+            summary = {'inserted': 0, 'errors': []}
+            if positions:
+                try:
+                    with span('mongo.write'):
+                        await create_many_async([data[i] for i in positions], chunk_size, summary)
+                except Exception as e:
+                    return bulk_insert_failed(data, summary, e)
+            return bulk_insert_result(data, positions, errors, summary)
+
+        await create_async(data)
+        return JsonResponse({'status': 'success', 'message': 'Data inserted successfully'})
+    except Exception as e:
+        return JsonResponse({'status': 'error', 'message': str(e)}, status=500)
+
+@wsgi_fallback(views.update_record)
+@csrf_exempt
+@require_http_methods(["PUT"])
+async def update_record(request, year):
+    """
+    API endpoint to update an existing record in MongoDB using the year.
+    """
+    try:
+        data = json.loads(request.body)
+        pipeline = build_update_pipeline(clean_update_data(data))
+        collection = connect_to_mongodb_async()
+
+        logger.debug("Updating record for Year: %s with data: %s", year, data)
+
+        # Set the new values and recompute the totals in one round trip
+        with span('mongo.write'):
+            result = await collection.update_one({"Year": int(year)}, pipeline)
+
+        if result.matched_count == 0:
+            logger.error(f"Record not found for Year: {year}")
+            return JsonResponse({'status': 'error', 'message': 'Record not found'}, status=404)
+
+        await notify_data_changed_async()
+        logger.info(f"Record updated successfully for Year: {year}")
+        return JsonResponse({'status': 'success', 'message': 'Record updated successfully'})
+    except ValueError as e:
+        return JsonResponse({'status': 'error', 'message': str(e)}, status=400)
+    except Exception as e:
+        logger.error(f"Error updating record: {e}")
+        return JsonResponse({'status': 'error', 'message': str(e)}, status=500)
+
+@wsgi_fallback(views.update_records)
+@csrf_exempt
+@require_http_methods(["PUT"])
+async def update_records(request):
+    """
+    API endpoint to update many records in one bulk write.
+    The body is a JSON array of objects, each with a "Year" and the fields to set.
+    """
+    try:
+        items = json.loads(request.body)
+        if not isinstance(items, list) or not items:
+            return JsonResponse({'status': 'error', 'message': 'Expected a non-empty JSON array'}, status=400)
+        if not all(isinstance(item, dict) and 'Year' in item for item in items):
+            return JsonResponse({'status': 'error', 'message': 'Every item must be an object with a Year'}, status=400)
+        try:
+            years = [parse_year(item['Year']) for item in items]
+        except (ValueError, TypeError):
+            return JsonResponse({'status': 'error', 'message': 'Year must be an integer'}, status=400)
+
+        collection = connect_to_mongodb_async()
+        try:
+            pipelines = [build_update_pipeline(clean_update_data(item)) for item in items]
+        except ValueError as e:
+            return JsonResponse({'status': 'error', 'message': str(e)}, status=400)
+        operations = [UpdateOne({"Year": year}, pipeline) for year, pipeline in zip(years, pipelines)]
+        errors = []
+        try:
+            with span('mongo.write'):
+                result = await collection.bulk_write(operations, ordered=False)
+            matched, modified = result.matched_count, result.modified_count
+        except BulkWriteError as e:
+            matched, modified, errors = bulk_write_errors(e)
+
+        missing = []
+        if matched + len(errors) < len(operations):
+            # Only look up which years were missing when some update did not match
+            with span('mongo.fetch'):
+                found = set(await collection.distinct("Year", {"Year": {"$in": years}}))
+            missing = sorted(set(years) - found)
+
+        if matched:
+            await notify_data_changed_async()
+        logger.info(f"Bulk update matched {matched} of {len(operations)} records with {len(errors)} errors")
+
+        return bulk_update_response(len(operations), matched, modified, missing, errors)
+    except json.JSONDecodeError as e:
+        return JsonResponse({'status': 'error', 'message': str(e)}, status=400)
+    except Exception as e:
+        logger.error(f"Error updating records: {e}")
+        return JsonResponse({'status': 'error', 'message': str(e)}, status=500)
+
+async def set_deleted_flag(year, deleted):
+    """
+    Set the soft-delete flag of the record for a year and report the outcome.
+    """
+    action = 'soft deleted' if deleted else 'recovered'
+    try:
+        collection = connect_to_mongodb_async()
+
+        with span('mongo.write'):
+            result = await collection.update_one(
+                {"Year": int(year)},
+                {"$set": {"isDeleted": deleted}}
+            )
+
+        if result.matched_count == 0:
+            logger.error(f"Record not found for Year: {year}")
+            return JsonResponse({'status': 'error', 'message': 'Record not found'}, status=404)
+
+        await notify_data_changed_async()
+        logger.info(f"Record {action} successfully for Year: {year}")
+        return JsonResponse({'status': 'success', 'message': f'Record {action} successfully'})
+    except Exception as e:
+        logger.error(f"Error setting isDeleted={deleted} on record: {e}")
+        return JsonResponse({'status': 'error', 'message': str(e)}, status=500)
+
+@wsgi_fallback(views.delete_record)
+@csrf_exempt
+@require_http_methods(["DELETE"])
+async def delete_record(request, year):
+    """
+    API endpoint to soft delete an existing record in MongoDB using the year.
+    """
+    return await set_deleted_flag(year, True)
+
+@wsgi_fallback(views.recover_record)
+@csrf_exempt
+@require_http_methods(["PUT"])
+async def recover_record(request, year):
+    """
+    API endpoint to recover a soft deleted record in MongoDB using the year.
+    """
+    return await set_deleted_flag(year, False)
+
+async def record_detail(request, collection, record_id, label, data_version, notify_changed, normalize=None):
+    """
+    Fetch, update, or delete one document by ObjectId on an async collection.
+
+    Parameters:
+        collection: AsyncMongoClient collection holding the record.
+        record_id (str): The record's ObjectId as a string.
+        label (str): Name used in response messages, e.g. "Record".
+        data_version (coroutine function): Returns the collection's data version, used for ETags.
+        notify_changed (coroutine function): Bumps the collection's data version after a write.
+        normalize (callable): Optional function applied to update bodies before writing.
+    """
+    try:
+        object_id = ObjectId(record_id)
+
+        if request.method == 'GET':
+            with span('mongo.version'):
+                etag = request_etag(request, await data_version())
+
+            async def build():
+                # Fetch record, optionally limited to the requested fields
+                with span('mongo.fetch'):
+                    record = await collection.find_one({'_id': object_id}, parse_fields(request))
+                if not record:
+                    return JsonResponse({'status': 'error', 'message': f'{label} not found'}, status=404)
+                # Convert ObjectId to string for JSON serialization
+                record['_id'] = str(record['_id'])
+                return JsonResponse({'status': 'success', 'record': record})
+
+            return await conditional_response_async(request, etag, build)
+
+        elif request.method == 'PUT' or request.method == 'PATCH':
+            data = json.loads(request.body)
+            # Remove _id field if it exists
+            data.pop('_id', None)
+            if normalize:
+                normalize(data)
+            logger.debug("Updating %s %s with data: %s", label.lower(), record_id, data)
+            with span('mongo.write'):
+                result = await collection.update_one({'_id': object_id}, {'$set': data})
+            if result.matched_count == 0:
+                return JsonResponse({'status': 'error', 'message': f'{label} not found'}, status=404)
+            await notify_changed()
+            return JsonResponse({'status': 'success', 'message': f'{label} updated successfully'})
+
+        elif request.method == 'DELETE':
+            with span('mongo.write'):
+                result = await collection.delete_one({'_id': object_id})
+            if result.deleted_count == 0:
+                return JsonResponse({'status': 'error', 'message': f'{label} not found'}, status=404)
+            await notify_changed()
+            return JsonResponse({'status': 'success', 'message': f'{label} deleted successfully'})
+
+        else:
+            return JsonResponse({'status': 'error', 'message': 'Method not allowed'}, status=405)
+
+    except ValueError as e:
+        # Malformed parameters such as an invalid field name
+        return JsonResponse({'status': 'error', 'message': str(e)}, status=400)
+    except Exception as e:
+        logger.error(f"Error in {label.lower()} detail: {e}")
+        return JsonResponse({'status': 'error', 'message': str(e)}, status=500)
+
+def _normalize_recommendation(data):
+    # Ensure Year is stored as integer
+    if 'Year' in data:
+        data['Year'] = int(data['Year'])
+
+@wsgi_fallback(views.peertopeer_record_detail)
+@csrf_exempt
+async def peertopeer_record_detail(request, record_id):
+    """
+    Endpoints to fetch, update, or delete a specific peer-to-peer energy record from MongoDB
+    """
+    return await record_detail(
+        request, connect_to_mongodb_peertopeer_async(), record_id, 'Record',
+        peertopeer_data_version_async, notify_peertopeer_changed_async
+    )
+
+@wsgi_fallback(views.recommendation_record_detail)
+@csrf_exempt
+async def recommendation_record_detail(request, record_id):
+    """
+    Endpoints to fetch, update, or delete a specific recommendation record from MongoDB
+    """
+    return await record_detail(
+        request, connect_to_mongodb_recommendation_async(), record_id, 'Recommendation record',
+        recommendation_data_version_async, notify_recommendation_changed_async, _normalize_recommendation
+    )
@@ -0,0 +1,55 @@
+import json
+import hashlib
+from django.utils.cache import get_conditional_response
+
+def make_etag(*parts):
+    """
+    Build a strong ETag from everything a response depends on, such as a
+    collection's data version and the request parameters.
+    """
+    raw = json.dumps(parts, separators=(',', ':'), sort_keys=True, default=str).encode()
+    return '"' + hashlib.sha256(raw).hexdigest()[:32] + '"'
+
+def request_etag(request, *parts):
+    """
+    ETag for a GET endpoint whose body depends on the path, the query string and `parts`.
+    """
+    query = sorted(request.GET.lists())
+    return make_etag(request.path, query, *parts)
+
+def not_modified(request, etag):
+    """
+    Return a 304 response when the client's If-None-Match already names `etag`, else None.
+    Call it before doing any work so unchanged polls skip the fetch and serialization.
+    """
+    response = get_conditional_response(request, etag=etag)
+    if response is not None:
+        response['ETag'] = etag
+    return response
+
+def with_etag(response, etag):
+    """
+    Attach an ETag to a successful response.
+    """
+    if 200 <= response.status_code < 300:
+        response['ETag'] = etag
+    return response
+
+def conditional_response(request, etag, build):
+    """
+    Answer with 304 when the client's If-None-Match already names `etag`, so unchanged
+    polls skip the fetch and serialization; otherwise return `build()` with the ETag attached.
+    """
+    response = not_modified(request, etag)
+    if response is None:
+        response = with_etag(build(), etag)
+    return response
+
+async def conditional_response_async(request, etag, build):
+    """
+    Async counterpart of conditional_response for a coroutine function `build`.
+    """
+    response = not_modified(request, etag)
+    if response is None:
+        response = with_etag(await build(), etag)
+    return response
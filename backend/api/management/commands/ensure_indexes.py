@@ -0,0 +1,135 @@
+from django.core.management.base import BaseCommand
+from pymongo import ASCENDING, IndexModel
+from pymongo.errors import OperationFailure
+from linearregression_predictiveanalysis import connect_to_mongodb
+from peertopeer import connect_to_mongodb_peertopeer
+from recommendations import connect_to_mongodb_recommendation
+
+# Indexes each collection must have, keyed by collection helper
+INDEX_SPECS = {
+    'predictiveAnalysis': (connect_to_mongodb, [
+        # update_record, delete_record and recover_record look records up by Year
+        IndexModel([('Year', ASCENDING)], name='Year_1'),
+        # Soft-deleted records are rare, so only they are indexed
+        IndexModel([('isDeleted', ASCENDING), ('Year', ASCENDING)], name='isDeleted_1_Year_1_deleted',
+                   partialFilterExpression={'isDeleted': True}),
+    ]),
+    'peertopeer': (connect_to_mongodb_peertopeer, [
+        # Each branch of the year/Year $or range query needs its own index
+        IndexModel([('Year', ASCENDING)], name='Year_1'),
+        IndexModel([('year', ASCENDING)], name='year_1'),
+    ]),
+    'recommendation': (connect_to_mongodb_recommendation, [
+        # Year filter plus (Year, _id) keyset pagination
+        IndexModel([('Year', ASCENDING), ('_id', ASCENDING)], name='Year_1__id_1'),
+    ]),
+}
+
+# Representative queries issued by the API, used to check the chosen plans
+QUERY_PLANS = {
+    'predictiveAnalysis': [
+        ('update/delete/recover by Year', {'Year': 2020}, None),
+        ('soft-deleted records', {'isDeleted': True}, None),
+    ],
+    'peertopeer': [
+        ('records by year range', {'$or': [
+            {'year': {'$gte': 2020, '$lte': 2030}},
+            {'Year': {'$gte': 2020, '$lte': 2030}}
+        ]}, None),
+        ('records page by _id', {}, [('_id', ASCENDING)]),
+    ],
+    'recommendation': [
+        ('recommendations by Year', {'Year': 2020}, None),
+        ('recommendations page by (Year, _id)', {}, [('Year', ASCENDING), ('_id', ASCENDING)]),
+    ],
+}
+
+# Index options that must match for an existing index to be kept
+COMPARED_OPTIONS = ('unique', 'partialFilterExpression', 'sparse', 'expireAfterSeconds')
+
+def _plan_stages(plan):
+    """
+    Return every stage name in a query plan tree.
+    """
+    stages = [plan.get('stage')]
+    if 'inputStage' in plan:
+        stages += _plan_stages(plan['inputStage'])
+    for child in plan.get('inputStages', []):
+        stages += _plan_stages(child)
+    return stages
+
+def _index_matches(existing, model):
+    """
+    Return True when an existing index has the same keys and options as the declared one.
+    """
+    document = model.document
+    if [tuple(key) for key in existing['key']] != list(document['key'].items()):
+        return False
+    return all(existing.get(option) == document.get(option) for option in COMPARED_OPTIONS)
+
+class Command(BaseCommand):
+    help = "Create or reconcile the MongoDB indexes used by the API and report each query's plan."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help="Only report what would change")
+        parser.add_argument('--prune', action='store_true', help="Drop indexes that are not declared")
+        parser.add_argument('--skip-plans', action='store_true', help="Do not explain the representative queries")
+
+    def handle(self, *args, **options):
+        dry_run = options['dry_run']
+        collscans = 0
+
+        for collection_name, (connect, models) in INDEX_SPECS.items():
+            collection = connect()
+            self.stdout.write(self.style.MIGRATE_HEADING(f"{collection_name}"))
+            existing = collection.index_information()
+            declared = {model.document['name']: model for model in models}
+
+            for name, model in declared.items():
+                if name in existing and _index_matches(existing[name], model):
+                    self.stdout.write(f"  ok       {name}")
+                    continue
+                if name in existing:
+                    self.stdout.write(self.style.WARNING(f"  rebuild  {name} (definition changed)"))
+                    if not dry_run:
+                        collection.drop_index(name)
+                else:
+                    self.stdout.write(self.style.SUCCESS(f"  create   {name}"))
+                if not dry_run:
+                    collection.create_indexes([model])
+
+            for name in existing:
+                if name == '_id_' or name in declared:
+                    continue
+                if options['prune']:
+                    self.stdout.write(self.style.WARNING(f"  drop     {name}"))
+                    if not dry_run:
+                        collection.drop_index(name)
+                else:
+                    self.stdout.write(f"  extra    {name} (kept; use --prune to drop)")
+
+            if options['skip_plans']:
+                continue
+            for label, query, sort in QUERY_PLANS.get(collection_name, []):
+                cursor = collection.find(query)
+                if sort:
+                    cursor = cursor.sort(sort)
+                try:
+                    plan = cursor.explain()['queryPlanner']['winningPlan']
+                    # Servers using the slot-based engine nest the classic plan tree
+                    plan = plan.get('queryPlan', plan)
+                except (OperationFailure, KeyError) as e:
+                    self.stdout.write(self.style.WARNING(f"  plan     {label}: unavailable ({e})"))
+                    continue
+                stages = [stage for stage in _plan_stages(plan) if stage]
+                summary = ' > '.join(stages)
+                if 'COLLSCAN' in stages:
+                    collscans += 1
+                    self.stdout.write(self.style.ERROR(f"  plan     {label}: {summary}"))
+                else:
+                    self.stdout.write(f"  plan     {label}: {summary}")
+
+        if collscans:
+            self.stdout.write(self.style.ERROR(f"{collscans} queries still use a collection scan"))
+        elif not options['skip_plans']:
+            self.stdout.write(self.style.SUCCESS("No collection scans in the representative queries"))
@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand, CommandError
+from model_store import MODEL_STORE_DIR
+from model_training import train_models, TRAINING_TARGETS, MODEL_VERSIONS_KEPT
+
+class Command(BaseCommand):
+    help = ("Retrain the renewable energy models whose training data changed and publish them "
+            "as a new model version that running servers switch to on their next request.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--force', action='store_true', help="Retrain every target even if its data is unchanged")
+        parser.add_argument('--workers', type=int, default=None, help="Worker processes used for fitting (default: one per changed target, up to the CPU count)")
+        parser.add_argument('--target', action='append', choices=TRAINING_TARGETS, help="Only consider this target; repeat for several")
+        parser.add_argument('--keep', type=int, default=MODEL_VERSIONS_KEPT, help="Number of newest model versions to keep")
+
+    def handle(self, *args, **options):
+        if options['workers'] is not None and options['workers'] < 1:
+            raise CommandError("--workers must be at least 1")
+
+        result = train_models(
+            targets=options['target'],
+            workers=options['workers'],
+            force=options['force'],
+            keep=options['keep']
+        )
+
+        for target in result['trained']:
+            self.stdout.write(self.style.SUCCESS(f"  trained  {target}"))
+        for target in result['reused']:
+            self.stdout.write(f"  reused   {target} (training data unchanged)")
+        if result['trained']:
+            self.stdout.write(self.style.SUCCESS(f"Published model version {result['version']} in {MODEL_STORE_DIR}"))
+        else:
+            self.stdout.write(f"Models are up to date (version {result['version'] or 'legacy'})")
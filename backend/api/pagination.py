@@ -0,0 +1,99 @@
+import json
+import base64
+import binascii
+from bson import ObjectId
+from bson.errors import InvalidId
+
+# Page size bounds for keyset-paginated listings
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 1000
+
+def encode_cursor(values):
+    """
+    Encode the sort key of the last returned document as an opaque URL-safe token.
+    """
+    raw = json.dumps(values, separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+def decode_cursor(token):
+    """
+    Decode a token produced by encode_cursor. Raises ValueError for malformed tokens.
+    """
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (binascii.Error, UnicodeDecodeError, json.JSONDecodeError) as e:
+        raise ValueError(f"Invalid cursor: {e}")
+    if not isinstance(values, dict) or 'id' not in values:
+        raise ValueError("Invalid cursor")
+    # The sort key is used as a query value, so it must not smuggle in operators
+    if isinstance(values.get('key'), (dict, list)):
+        raise ValueError("Invalid cursor")
+    try:
+        values['id'] = ObjectId(values['id'])
+    except (InvalidId, TypeError):
+        raise ValueError("Invalid cursor")
+    return values
+
+def parse_page_size(request):
+    """
+    Return the requested page size, or None when the client did not ask for pagination.
+    """
+    limit = request.GET.get('limit')
+    if limit is None:
+        return None
+    limit = int(limit)
+    if limit < 1:
+        raise ValueError("limit must be at least 1")
+    return min(limit, MAX_PAGE_SIZE)
+
+def paginate(collection, query, limit, after=None, order_field=None, projection=None):
+    """
+    Fetch one page of documents using keyset pagination.
+
+    Documents are ordered by _id, or by (order_field, _id) when order_field is
+    given, and each page starts right after the cursor's sort key. Every page
+    is a bounded index range scan, so deep pages cost the same as the first.
+
+    Returns:
+        tuple: (records with string _ids, token for the next page or None).
+    """
+    if projection is not None and order_field:
+        # The sort key must come back with each document to build the next cursor
+        projection = {**projection, order_field: 1}
+    sort = [(order_field, 1), ('_id', 1)] if order_field else [('_id', 1)]
+
+    if after:
+        cursor_values = decode_cursor(after)
+        if order_field:
+            last_value = cursor_values.get('key')
+            if last_value is None:
+                # Documents without the field sort first; continue within them, then everything else
+                later = {order_field: {'$ne': None}}
+            else:
+                later = {order_field: {'$gt': last_value}}
+            keyset = {'$or': [
+                later,
+                {order_field: last_value, '_id': {'$gt': cursor_values['id']}}
+            ]}
+        else:
+            keyset = {'_id': {'$gt': cursor_values['id']}}
+        query = {'$and': [query, keyset]} if query else keyset
+
+    # Fetch one extra document to learn whether another page exists
+    records = list(collection.find(query, projection).sort(sort).limit(limit + 1))
+    has_more = len(records) > limit
+    records = records[:limit]
+
+    next_token = None
+    if has_more and records:
+        last = records[-1]
+        cursor_values = {'id': str(last['_id'])}
+        if order_field:
+            cursor_values['key'] = last.get(order_field)
+        next_token = encode_cursor(cursor_values)
+
+    for record in records:
+        # Convert ObjectId to string for JSON serialization
+        record['_id'] = str(record['_id'])
+    return records, next_token
@@ -0,0 +1,16 @@
+def parse_fields(request):
+    """
+    Build a MongoDB projection from a comma-separated ?fields= query parameter.
+
+    Returns None when the parameter is absent so the full document is fetched.
+    _id is always returned because responses and pagination cursors rely on it.
+    """
+    fields = request.GET.get('fields')
+    if fields is None:
+        return None
+    names = [name.strip() for name in fields.split(',') if name.strip()]
+    if any(name.startswith('$') for name in names):
+        raise ValueError("Field names may not start with '$'")
+    projection = {name: 1 for name in names}
+    projection['_id'] = 1
+    return projection
@@ -0,0 +1,49 @@
+import logging
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import StreamingHttpResponse
+
+# Configure the logger
+logger = logging.getLogger(__name__)
+
+# Documents pulled from MongoDB and written to the client per chunk
+STREAM_BATCH_SIZE = 500
+
+def wants_stream(request):
+    """
+    Return True when the client opted into a streamed response with ?stream=1.
+    """
+    return request.GET.get('stream', '').lower() in ('1', 'true', 'yes')
+
+def stream_records(cursor, batch_size=STREAM_BATCH_SIZE):
+    """
+    Stream a MongoDB cursor as {"status": "success", "records": [...]} without
+    materializing the result set. Documents are serialized one cursor batch at
+    a time, so memory stays flat and the first bytes go out after one batch.
+    """
+    cursor = cursor.batch_size(batch_size)
+    encoder = DjangoJSONEncoder()
+
+    def generate():
+        yield '{"status": "success", "records": ['
+        chunk = []
+        separator = ''
+        try:
+            for record in cursor:
+                # Convert ObjectId to string for JSON serialization
+                record['_id'] = str(record['_id'])
+                chunk.append(separator + encoder.encode(record))
+                separator = ','
+                if len(chunk) >= batch_size:
+                    yield ''.join(chunk)
+                    chunk = []
+            if chunk:
+                yield ''.join(chunk)
+        except Exception as e:
+            # Headers are already sent, so the client sees a truncated body
+            logger.error(f"Error while streaming records: {e}")
+            raise
+        finally:
+            cursor.close()
+        yield ']}'
+
+    return StreamingHttpResponse(generate(), content_type='application/json')
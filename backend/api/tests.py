@@ -1,3 +1,251 @@
-from django.test import TestCase
+import json
+from unittest import mock
+import mongomock
+import numpy as np
+from django.test import SimpleTestCase
+from pymongo.errors import AutoReconnect, BulkWriteError
+import mongodb
+from linearregression_predictiveanalysis import COLLECTION_NAME, current_data_version
+from peertopeer import COLLECTION_NAME as PEERTOPEER_COLLECTION
+from recommendations import RECOMMENDATION_COLLECTION
+from api.pagination import encode_cursor
 
-# Create your tests here.
+class MongoTestCase(SimpleTestCase):
+    """
+    Runs each test against a fresh in-memory MongoDB behind the shared client.
+    """
+
+    def setUp(self):
+        patcher = mock.patch('mongodb._client', mongomock.MongoClient())
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.collection = mongodb.get_collection(COLLECTION_NAME)
+        self.collection.insert_many([
+            {'Year': year, 'Solar (GWh)': 10.0, 'Wind (GWh)': 20.0, 'Non-Renewable Energy (GWh)': 100.0, 'isPredicted': False}
+            for year in (2020, 2021, 2022)
+        ])
+
+    def put_json(self, path, data):
+        return self.client.put(path, json.dumps(data), content_type='application/json')
+
+    def post_json(self, path, data):
+        return self.client.post(path, json.dumps(data), content_type='application/json')
+
+class UpdateRecordsTests(MongoTestCase):
+
+    def test_partial_bulk_write_failure_reports_errors_and_bumps_version(self):
+        error = BulkWriteError({
+            'nMatched': 1,
+            'nModified': 1,
+            'writeErrors': [{'index': 1, 'code': 14, 'errmsg': '$add only supports numeric types'}]
+        })
+        with mock.patch.object(mongomock.collection.Collection, 'bulk_write', side_effect=error):
+            response = self.put_json('/api/update/', [
+                {'Year': 2020, 'Solar (GWh)': 11},
+                {'Year': 2021, 'Solar (GWh)': 12},
+                {'Year': 1990, 'Solar (GWh)': 13}
+            ])
+
+        self.assertEqual(response.status_code, 207)
+        body = response.json()
+        self.assertEqual(body['matched'], 1)
+        self.assertEqual(body['missing'], [1990])
+        self.assertEqual(body['errors'], [{'index': 1, 'message': '$add only supports numeric types'}])
+        self.assertEqual(current_data_version(), 1)
+
+    def test_failed_bulk_write_without_matches_keeps_version(self):
+        error = BulkWriteError({'nMatched': 0, 'nModified': 0, 'writeErrors': [{'index': 0, 'errmsg': 'failed'}]})
+        with mock.patch.object(mongomock.collection.Collection, 'bulk_write', side_effect=error):
+            response = self.put_json('/api/update/', [{'Year': 2020, 'Solar (GWh)': 11}])
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(current_data_version(), 0)
+
+    def test_fractional_year_is_rejected(self):
+        response = self.put_json('/api/update/', [{'Year': 2020.7, 'Solar (GWh)': 11}])
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.collection.find_one({'Year': 2020})['Solar (GWh)'], 10.0)
+
+    def test_update_never_rewrites_year(self):
+        response = self.put_json('/api/update/2020/', {'Year': '1999', 'Solar (GWh)': 11})
+
+        self.assertEqual(response.status_code, 200)
+        record = self.collection.find_one({'Year': 2020})
+        self.assertEqual(record['Solar (GWh)'], 11)
+        self.assertEqual(record['Total Renewable Energy (GWh)'], 31)
+        self.assertEqual(record['Total Power Generation (GWh)'], 131)
+
+    def test_body_without_updatable_fields_recomputes_totals(self):
+        for body in ({}, {'Year': 2020}):
+            response = self.put_json('/api/update/2020/', body)
+
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(self.collection.find_one({'Year': 2020})['Total Renewable Energy (GWh)'], 30)
+
+    def test_comma_formatted_values_are_stored_as_numbers(self):
+        response = self.put_json('/api/update/2020/', {'Solar (GWh)': '1,200'})
+
+        self.assertEqual(response.status_code, 200)
+        record = self.collection.find_one({'Year': 2020})
+        self.assertEqual(record['Solar (GWh)'], 1200.0)
+        self.assertEqual(record['Total Renewable Energy (GWh)'], 1220.0)
+
+    def test_non_numeric_values_are_rejected(self):
+        for body in ({'Solar (GWh)': 'abc'}, {'Solar (GWh)': True}, [1, 2]):
+            response = self.put_json('/api/update/2020/', body)
+            self.assertEqual(response.status_code, 400)
+        response = self.put_json('/api/update/', [{'Year': 2020, 'Wind (GWh)': 'n/a'}])
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.collection.find_one({'Year': 2020})['Solar (GWh)'], 10.0)
+
+class AsyncViewsUnderWsgiTests(MongoTestCase):
+
+    def test_wsgi_requests_use_the_shared_sync_client(self):
+        with mock.patch('mongodb.AsyncMongoClient', side_effect=AssertionError('per-request async client')):
+            response = self.put_json('/api/async/update/2020/', {'Solar (GWh)': 11})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.collection.find_one({'Year': 2020})['Solar (GWh)'], 11)
+
+class CreateManyTests(MongoTestCase):
+
+    def test_failure_on_later_chunk_reports_count_and_bumps_version(self):
+        insert_many = mongomock.collection.Collection.insert_many
+        calls = []
+
+        def flaky_insert_many(collection, documents, *args, **kwargs):
+            calls.append(len(documents))
+            if len(calls) == 2:
+                raise AutoReconnect('connection reset')
+            return insert_many(collection, documents, *args, **kwargs)
+
+        with mock.patch.object(mongomock.collection.Collection, 'insert_many', flaky_insert_many):
+            response = self.post_json('/api/create/?chunk_size=2', [{'Year': year} for year in range(2030, 2035)])
+
+        self.assertEqual(response.status_code, 500)
+        self.assertEqual(response.json()['inserted'], 2)
+        self.assertEqual(self.collection.count_documents({'Year': {'$gte': 2030}}), 2)
+        self.assertEqual(current_data_version(), 1)
+
+    def test_invalid_chunk_size_is_rejected(self):
+        for chunk_size in ('abc', '0'):
+            response = self.post_json(f'/api/create/?chunk_size={chunk_size}', [{'Year': 2030}])
+            self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.collection.count_documents({'Year': 2030}), 0)
+
+class SolarRoiGridTests(SimpleTestCase):
+
+    def test_oversized_grid_is_rejected_before_building_axes(self):
+        for query in ('budget_steps=10000000000', 'end_year=1000000000000'):
+            with mock.patch('api.views.np.linspace', wraps=np.linspace) as linspace:
+                response = self.client.get(f'/api/solar_recommendations/grid/?{query}')
+            self.assertEqual(response.status_code, 400)
+            linspace.assert_not_called()
+
+    def test_grid_within_cap(self):
+        response = self.client.get('/api/solar_recommendations/grid/?start_year=2024&end_year=2026&budget_steps=4')
+
+        self.assertEqual(response.status_code, 200)
+        grid = response.json()['grid']
+        self.assertEqual(grid['years'], [2024, 2025, 2026])
+        self.assertEqual(len(grid['budgets']), 4)
+        self.assertEqual(np.shape(grid['yearly_savings']), (3, 4, 1))
+
+class SolarRecommendationsBatchTests(SimpleTestCase):
+
+    def post_batch(self, body):
+        return self.client.post('/api/solar_recommendations/batch/', body, content_type='application/json')
+
+    def test_non_object_body_is_rejected(self):
+        for body in ('[1, 2]', '"x"', '{"years": "2024", "budgets": [100000]}'):
+            self.assertEqual(self.post_batch(body).status_code, 400)
+
+    def test_fractional_year_is_rejected(self):
+        response = self.post_batch(json.dumps({'years': [2024.9], 'budgets': [100000]}))
+
+        self.assertEqual(response.status_code, 400)
+
+    def test_integral_years_are_accepted(self):
+        response = self.post_batch(json.dumps({'years': [2024, 2025.0], 'budgets': [100000]}))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([result['year'] for result in response.json()['results']], [2024, 2025])
+
+class KeysetPaginationTests(MongoTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.recommendations = mongodb.get_collection(RECOMMENDATION_COLLECTION)
+        self.recommendations.insert_many(
+            [{'Year': year, 'Budget': budget} for year in (2025, 2024, 2026) for budget in (1, 2)]
+            + [{'Year': None, 'Budget': 3}, {'Budget': 4}, {'Year': None, 'Budget': 5}]
+        )
+
+    def fetch_all(self, path, limit):
+        records, after = [], None
+        while True:
+            query = f'limit={limit}' + (f'&after={after}' if after else '')
+            body = self.client.get(f'{path}?{query}').json()
+            records.extend(body['records'])
+            after = body['next']
+            if after is None:
+                return records
+
+    def test_pages_cover_every_record_once_in_order(self):
+        for limit in (1, 2, 4, 100):
+            records = self.fetch_all('/api/add/recommendations', limit)
+
+            ids = [record['_id'] for record in records]
+            self.assertEqual(len(ids), 9)
+            self.assertEqual(set(ids), {str(doc['_id']) for doc in self.recommendations.find()})
+            years = [record.get('Year') for record in records]
+            self.assertEqual(years, [None] * 3 + [2024] * 2 + [2025] * 2 + [2026] * 2)
+
+    def test_page_boundary_inside_null_years(self):
+        first = self.client.get('/api/add/recommendations?limit=2').json()
+        self.assertEqual([record.get('Year') for record in first['records']], [None, None])
+
+        second = self.client.get(f"/api/add/recommendations?limit=2&after={first['next']}").json()
+        self.assertEqual([record.get('Year') for record in second['records']], [None, 2024])
+        self.assertFalse({r['_id'] for r in first['records']} & {r['_id'] for r in second['records']})
+
+    def test_pages_ordered_by_id(self):
+        peertopeer = mongodb.get_collection(PEERTOPEER_COLLECTION)
+        peertopeer.insert_many([{'Year': year} for year in range(2020, 2025)])
+
+        records = self.fetch_all('/api/peertopeer/records', 2)
+
+        self.assertEqual([record['_id'] for record in records], [str(doc['_id']) for doc in peertopeer.find().sort('_id', 1)])
+
+    def test_invalid_cursor_is_rejected(self):
+        record_id = str(self.recommendations.find_one()['_id'])
+        for after in ('not-a-cursor', '!!!', encode_cursor(['x']), encode_cursor({'id': 'zz'}),
+                      encode_cursor({'key': 2024}), encode_cursor({'id': record_id, 'key': {'$ne': None}})):
+            response = self.client.get(f'/api/add/recommendations?limit=2&after={after}')
+            self.assertEqual(response.status_code, 400, after)
+
+class ConditionalResponseTests(MongoTestCase):
+
+    def test_matching_etag_answers_304_without_fetching(self):
+        record_id = self.recommendations_id()
+        first = self.client.get(f'/api/add/recommendations/{record_id}')
+        self.assertEqual(first.status_code, 200)
+
+        find_one = mongomock.collection.Collection.find_one
+        with mock.patch.object(mongomock.collection.Collection, 'find_one', autospec=True, side_effect=find_one) as spy:
+            response = self.client.get(f'/api/add/recommendations/{record_id}', HTTP_IF_NONE_MATCH=first['ETag'])
+
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], first['ETag'])
+        # Only the data version is read, never the record itself
+        self.assertNotIn(RECOMMENDATION_COLLECTION, [call.args[0].name for call in spy.call_args_list])
+
+    def test_error_responses_carry_no_etag(self):
+        response = self.client.get('/api/add/recommendations/000000000000000000000000')
+
+        self.assertEqual(response.status_code, 404)
+        self.assertNotIn('ETag', response)
+
+    def recommendations_id(self):
+        return str(mongodb.get_collection(RECOMMENDATION_COLLECTION).insert_one({'Year': 2024}).inserted_id)
@@ -1,10 +1,16 @@
-from django.urls import path
+from django.urls import include, path
+from . import async_views
 from .views import (
     get_renewable_energy_predictions, 
+    get_all_renewable_energy_predictions,
     peertopeer_predictions, 
     solar_recommendations, 
+    solar_recommendations_batch,
+    solar_roi_grid,
+    cache_stats,
     CreateView, 
     update_record, 
+    update_records,
     delete_record, 
     recover_record, 
     CreateViewPeertoPeer,
@@ -14,17 +20,40 @@ from .views import (
     recommendation_record_detail
 )
 
+# Served natively by an ASGI server. Under WSGI each request is handed to the sync
+# view of the same endpoint. The peer-to-peer and recommendation list/create
+# endpoints and create/peertopeer/ have no async variant yet.
+async_urlpatterns = [
+    path('predictions/all/', async_views.get_all_renewable_energy_predictions, name='async_get_all_predictions'),
+    path('predictions/<str:target>/', async_views.get_renewable_energy_predictions, name='async_get_predictions'),
+    path('peertopeer/', async_views.peertopeer_predictions, name='async_peertopeer_predictions'),
+    path('create/', async_views.create_record, name='async_insert_actual_data'),
+    path('update/', async_views.update_records, name='async_update_records'),
+    path('update/<int:year>/', async_views.update_record, name='async_update_record'),
+    path('delete/<int:year>/', async_views.delete_record, name='async_delete_record'),
+    path('recover/<int:year>/', async_views.recover_record, name='async_recover_record'),
+    path('peertopeer/records/<str:record_id>', async_views.peertopeer_record_detail, name='async_peertopeer_record_detail'),
+    path('add/recommendations/<str:record_id>', async_views.recommendation_record_detail, name='async_recommendation_record_detail')
+]
+
 urlpatterns = [
+    path('predictions/all/', get_all_renewable_energy_predictions, name='get_all_predictions'),
     path('predictions/<str:target>/', get_renewable_energy_predictions, name='get_predictions'),
     path('peertopeer/', peertopeer_predictions, name='peertopeer_predictions'),
     path('solar_recommendations/', solar_recommendations, name='solar_recommendations'),
+    path('solar_recommendations/batch/', solar_recommendations_batch, name='solar_recommendations_batch'),
+    path('solar_recommendations/grid/', solar_roi_grid, name='solar_roi_grid'),
+    path('cache/stats/', cache_stats, name='cache_stats'),
     path('create/', CreateView.as_view(), name='insert_actual_data'),
     path('create/peertopeer/', CreateViewPeertoPeer.as_view(), name='insert_actual_data'),
+    path('update/', update_records, name='update_records'),
     path('update/<int:year>/', update_record, name='update_record'),
     path('delete/<int:year>/', delete_record, name='delete_record'),
     path('recover/<int:year>/', recover_record, name='recover_record'),
     path('peertopeer/records', peertopeer_records, name='peertopeer_records'),
     path('peertopeer/records/<str:record_id>', peertopeer_record_detail, name='peertopeer_record_detail'),
     path('add/recommendations', add_recommendation, name='recommendation_records'),
-    path('add/recommendations/<str:record_id>', recommendation_record_detail, name='recommendation_record_detail')
-]
\ No newline at end of file
+    path('add/recommendations/<str:record_id>', recommendation_record_detail, name='recommendation_record_detail'),
+    # Async variants of the same endpoints for ASGI deployments
+    path('async/', include(async_urlpatterns))
+]
@@ -1,17 +1,28 @@
 # filepath: /d:/TUP/ECOPULSE/backend/api/views.py
-from django.http import JsonResponse
+from django.http import HttpResponse, JsonResponse
 from django.views.decorators.http import require_GET
-from linearregression_predictiveanalysis import get_predictions, create, connect_to_mongodb  # Import the function here
-from peertopeer import get_peer_to_predictions, createPeertoPeer, connect_to_mongodb_peertopeer
-from recommendations import get_solar_recommendations, recommendation_records, connect_to_mongodb_recommendation
+from linearregression_predictiveanalysis import get_predictions, create, create_many, connect_to_mongodb, notify_data_changed  # Import the function here
+from linearregression_predictiveanalysis import NUMERIC_COLUMNS, current_data_version, current_model_version, forecast_cache, model_registry, coefficient_registry, get_predictions_multi, PREDICTION_TARGETS
+from peertopeer import get_peer_to_prediction_records, createPeertoPeer, createPeertoPeerMany, connect_to_mongodb_peertopeer
+from peertopeer import peertopeer_data_version, notify_peertopeer_changed, forecast_source_signature
+from recommendations import get_solar_recommendations, get_solar_recommendations_batch, get_roi_sensitivity_grid, roi_grid_cache, connect_to_mongodb_recommendation
+from recommendations import recommendation_data_version, notify_recommendation_changed
+import math
 import logging
+import numpy as np
+from tracing import span
+from api.streaming import wants_stream, stream_records
+from api.pagination import parse_page_size, paginate
+from api.projection import parse_fields
+from api.etags import make_etag, request_etag, conditional_response
 from django.views.decorators.csrf import csrf_exempt
 from django.utils.decorators import method_decorator
 from django.views import View
 import json
 from django.views.decorators.http import require_http_methods
 from bson import ObjectId
-from pymongo import MongoClient
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
 
 # Configure the logger
 logging.basicConfig(level=logging.DEBUG)
@@ -37,24 +48,113 @@ def get_renewable_energy_predictions(request, target):
         # Log the request parameters
         logger.debug(f"Received request for target: {target}, start_year: {start_year}, end_year: {end_year}")
         
-        # Get predictions for the specified target
-        predictions = get_predictions(target, start_year, end_year)
+        with span('mongo.version'):
+            cache_key = (current_data_version(), current_model_version(), target, start_year, end_year)
         
-        # Convert the DataFrame to a dictionary for JSON response
-        predictions_dict = predictions.to_dict(orient='records')
+        def build():
+            # Serve repeated queries from the response cache while the data is unchanged
+            body = forecast_cache.get(cache_key)
+            if body is not None:
+                return HttpResponse(body, content_type='application/json')
+
+            # Get predictions for the specified target
+            predictions = get_predictions(target, start_year, end_year)
+
+            with span('serialize'):
+                # Convert the DataFrame to a dictionary for JSON response
+                predictions_dict = predictions.to_dict(orient='records')
+
+                response = JsonResponse({
+                    'status': 'success',
+                    'target': target,
+                    'predictions': predictions_dict
+                })
+            forecast_cache.set(cache_key, response.content)
+            return response
+
+        return conditional_response(request, make_etag('predictions', *cache_key), build)
+    except Exception as e:
+        logger.error(f"Error in get_renewable_energy_predictions: {e}")
+        return JsonResponse({
+            'status': 'error',
+            'message': str(e)
+        }, status=500)
+
+def parse_targets(request):
+    """
+    Return the targets requested with ?targets=solar,wind, defaulting to all of them.
+    Raises ValueError for unknown targets.
+    """
+    targets = request.GET.get('targets')
+    if not targets:
+        return list(PREDICTION_TARGETS)
+    targets = [target.strip().lower() for target in targets.split(',') if target.strip()]
+    unknown = [target for target in targets if target not in PREDICTION_TARGETS]
+    if unknown or not targets:
+        raise ValueError(f"Unknown targets: {', '.join(unknown)}. Expected any of: {', '.join(PREDICTION_TARGETS)}")
+    # Drop duplicates but keep the requested order
+    return list(dict.fromkeys(targets))
+
+@require_GET
+def get_all_renewable_energy_predictions(request):
+    """
+    API endpoint to get predictions for several renewable energy targets at once.
+    The data is loaded once and all models are applied in one stacked matrix multiply.
+    """
+    try:
+        start_year = int(request.GET.get('start_year') or 2024)
+        end_year = int(request.GET.get('end_year') or 2040)
+        targets = parse_targets(request)
+        
+        logger.debug(f"Received request for targets: {targets}, start_year: {start_year}, end_year: {end_year}")
+        
+        with span('mongo.version'):
+            cache_key = (current_data_version(), current_model_version(), tuple(targets), start_year, end_year)
         
+        def build():
+            # Serve repeated queries from the response cache while the data is unchanged
+            body = forecast_cache.get(cache_key)
+            if body is not None:
+                return HttpResponse(body, content_type='application/json')
+
+            forecasts = get_predictions_multi(targets, start_year, end_year)
+
+            with span('serialize'):
+                response = JsonResponse({
+                    'status': 'success',
+                    'start_year': start_year,
+                    'end_year': end_year,
+                    'predictions': {target: forecast.to_dict(orient='records') for target, forecast in forecasts.items()}
+                })
+            forecast_cache.set(cache_key, response.content)
+            return response
+
+        return conditional_response(request, make_etag('predictions-multi', *cache_key), build)
+    except ValueError as e:
         return JsonResponse({
-            'status': 'success',
-            'target': target,
-            'predictions': predictions_dict
-        })
+            'status': 'error',
+            'message': str(e)
+        }, status=400)
     except Exception as e:
-        logger.error(f"Error in get_renewable_energy_predictions: {e}")
+        logger.error(f"Error in get_all_renewable_energy_predictions: {e}")
         return JsonResponse({
             'status': 'error',
             'message': str(e)
         }, status=500)
 
+@require_GET
+def cache_stats(request):
+    """
+    API endpoint reporting hit ratios of the response caches and the model registries.
+    """
+    return JsonResponse({
+        'status': 'success',
+        'forecast_cache': forecast_cache.stats(),
+        'roi_grid_cache': roi_grid_cache.stats(),
+        'model_registry': model_registry.stats(),
+        'coefficient_registry': coefficient_registry.stats()
+    })
+
 @require_GET
 def peertopeer_predictions(request):
     """
@@ -73,16 +173,20 @@ def peertopeer_predictions(request):
 
         logger.debug(f"Received request with year: {year}")
 
-        # Get predictions for the specified year and filters
-        predictions = get_peer_to_predictions(year)
-        
-        # Convert the DataFrame to a dictionary for JSON response
-        predictions_dict = predictions.to_dict(orient='records')
-        
-        return JsonResponse({
-            'status': 'success',
-            'predictions': predictions_dict
-        })
+        # The forecast only changes with the workbook it is built from
+        etag = make_etag('peertopeer', forecast_source_signature(), year)
+
+        def build():
+            # Get predictions for the specified year and filters as JSON-ready records
+            predictions_dict = get_peer_to_prediction_records(year)
+
+            with span('serialize'):
+                return JsonResponse({
+                    'status': 'success',
+                    'predictions': predictions_dict
+                })
+
+        return conditional_response(request, etag, build)
     except Exception as e:
         logger.error(f"Error in peertopeer_predictions: {e}")
         return JsonResponse({
@@ -104,16 +208,209 @@ def solar_recommendations(request):
         # Get solar recommendations
         recommendations = get_solar_recommendations(year, budget)
         
-        return JsonResponse({
-            'status': 'success',
-            'recommendations': recommendations
-        })
+        with span('serialize'):
+            return JsonResponse({
+                'status': 'success',
+                'recommendations': recommendations
+            })
     except Exception as e:
         logger.error(f"Error in solar_recommendations: {e}")
         return JsonResponse({
             'status': 'error',
             'message': str(e)}, status=500)
 
+# Upper bound on (year, budget) pairs evaluated by one batch request
+MAX_SOLAR_BATCH_SIZE = 10000
+
+@csrf_exempt
+@require_http_methods(["POST"])
+def solar_recommendations_batch(request):
+    """
+    API endpoint to get solar recommendations for many (year, budget) pairs in one request.
+    Expects a JSON body with equal-length 'years' and 'budgets' arrays; a single-item
+    array is paired with every item of the other.
+    """
+    try:
+        data = json.loads(request.body)
+        if not isinstance(data, dict):
+            return JsonResponse({'status': 'error', 'message': 'Expected a JSON object'}, status=400)
+        if not all(isinstance(data.get(name, []), list) for name in ('years', 'budgets')):
+            return JsonResponse({'status': 'error', 'message': "'years' and 'budgets' must be arrays"}, status=400)
+        years = [parse_year(year) for year in data.get('years', [])]
+        budgets = [float(budget) for budget in data.get('budgets', [])]
+
+        if not years or not budgets:
+            return JsonResponse({'status': 'error', 'message': "Both 'years' and 'budgets' are required"}, status=400)
+        if len(years) != len(budgets) and 1 not in (len(years), len(budgets)):
+            return JsonResponse({'status': 'error', 'message': "'years' and 'budgets' must have the same length"}, status=400)
+        if max(len(years), len(budgets)) > MAX_SOLAR_BATCH_SIZE:
+            return JsonResponse({'status': 'error', 'message': f"At most {MAX_SOLAR_BATCH_SIZE} pairs per request"}, status=400)
+
+        logger.debug(f"Received batch request with {max(len(years), len(budgets))} pairs")
+
+        results = get_solar_recommendations_batch(years, budgets)
+
+        with span('serialize'):
+            return JsonResponse({
+                'status': 'success',
+                'results': results
+            })
+    except (ValueError, TypeError) as e:
+        return JsonResponse({'status': 'error', 'message': str(e)}, status=400)
+    except Exception as e:
+        logger.error(f"Error in solar_recommendations_batch: {e}")
+        return JsonResponse({
+            'status': 'error',
+            'message': str(e)}, status=500)
+
+# Upper bound on cells in one ROI sensitivity grid
+MAX_ROI_GRID_CELLS = 250000
+
+def _grid_axis_spec(request, name, default_min, default_max, default_steps):
+    """
+    Read the min_<name>, max_<name> and <name>_steps query parameters of a grid axis.
+    The axis itself is only built once the size of the whole grid has been checked.
+    """
+    low = float(request.GET.get(f'min_{name}', default_min))
+    high = float(request.GET.get(f'max_{name}', default_max))
+    steps = int(request.GET.get(f'{name}_steps', default_steps))
+    if steps < 1:
+        raise ValueError(f"{name}_steps must be at least 1")
+    return low, high, steps
+
+def _grid_axis(low, high, steps):
+    """
+    Build an evenly spaced grid axis.
+    """
+    return tuple(np.linspace(low, high, steps).tolist())
+
+@require_GET
+def solar_roi_grid(request):
+    """
+    API endpoint returning payback years and yearly savings over a
+    year x budget x daily-production grid whose resolution is set by the caller.
+    """
+    try:
+        start_year = int(request.GET.get('start_year', 2024))
+        end_year = int(request.GET.get('end_year', 2040))
+        year_step = int(request.GET.get('year_step', 1))
+        if year_step < 1 or end_year < start_year:
+            raise ValueError("Invalid year range")
+        budget_spec = _grid_axis_spec(request, 'budget', 50000, 500000, 10)
+        production_spec = _grid_axis_spec(request, 'production', 4, 4, 1)
+
+        # Size the grid arithmetically so oversized requests never allocate their axes
+        cells = ((end_year - start_year) // year_step + 1) * budget_spec[2] * production_spec[2]
+        if cells > MAX_ROI_GRID_CELLS:
+            return JsonResponse({'status': 'error', 'message': f"Grid has {cells} cells; at most {MAX_ROI_GRID_CELLS} are allowed"}, status=400)
+
+        years = tuple(range(start_year, end_year + 1, year_step))
+        budgets = _grid_axis(*budget_spec)
+        daily_productions = _grid_axis(*production_spec)
+
+        logger.debug(f"Received ROI grid request with {cells} cells")
+
+        # Repeated grids are served from the byte-bounded response cache
+        cache_key = ('roi_grid', years, budgets, daily_productions)
+        body = roi_grid_cache.get(cache_key)
+        if body is not None:
+            return HttpResponse(body, content_type='application/json')
+
+        grid = get_roi_sensitivity_grid(years, budgets, daily_productions)
+
+        with span('serialize'):
+            response = JsonResponse({
+                'status': 'success',
+                'grid': grid
+            })
+        roi_grid_cache.set(cache_key, response.content)
+        return response
+    except ValueError as e:
+        return JsonResponse({'status': 'error', 'message': str(e)}, status=400)
+    except Exception as e:
+        logger.error(f"Error in solar_roi_grid: {e}")
+        return JsonResponse({
+            'status': 'error',
+            'message': str(e)}, status=500)
+
+def split_bulk_items(items):
+    """
+    Return the positions of the JSON objects in a bulk request and errors for everything else.
+    Items that are not JSON objects are rejected without being sent to MongoDB.
+    """
+    positions = [i for i, item in enumerate(items) if isinstance(item, dict)]
+    errors = [{'index': i, 'message': 'Item is not a JSON object'} for i, item in enumerate(items) if not isinstance(item, dict)]
+    return positions, errors
+
+def bulk_insert_result(items, positions, errors, summary):
+    """
+    Build the response of a bulk insert from an insert_many_chunked summary.
+    Error indexes are mapped back to positions in the request array.
+    """
+    errors = errors + [{'index': positions[error['index']], 'message': error['message']} for error in summary['errors']]
+    errors.sort(key=lambda error: error['index'])
+
+    if not errors:
+        status, code = 'success', 200
+    elif summary['inserted']:
+        status, code = 'partial', 207
+    else:
+        status, code = 'error', 400
+    return JsonResponse({
+        'status': status,
+        'message': f"Inserted {summary['inserted']} of {len(items)} documents",
+        'inserted': summary['inserted'],
+        'errors': errors
+    }, status=code)
+
+def parse_chunk_size(request):
+    """
+    Return the ?chunk_size= of a bulk insert, or None for the default.
+    Raises ValueError for anything but a positive integer.
+    """
+    chunk_size = request.GET.get('chunk_size')
+    if not chunk_size:
+        return None
+    try:
+        chunk_size = int(chunk_size)
+    except ValueError:
+        raise ValueError('chunk_size must be an integer')
+    if chunk_size < 1:
+        raise ValueError('chunk_size must be at least 1')
+    return chunk_size
+
+def bulk_insert_failed(items, summary, error):
+    """
+    Build the 500 response of a bulk insert that was interrupted, e.g. by a network error.
+    Chunks written before the failure stay committed, so their count is reported.
+    """
+    logger.error(f"Bulk insert failed after {summary['inserted']} of {len(items)} documents: {error}")
+    return JsonResponse({
+        'status': 'error',
+        'message': f"Inserted {summary['inserted']} of {len(items)} documents before failing: {error}",
+        'inserted': summary['inserted']
+    }, status=500)
+
+def bulk_insert_response(request, items, insert_many):
+    """
+    Insert a JSON array of documents with `insert_many` and report per-item errors.
+    The chunk size of each bulk write can be set with ?chunk_size=.
+    """
+    try:
+        chunk_size = parse_chunk_size(request)
+    except ValueError as e:
+        return JsonResponse({'status': 'error', 'message': str(e)}, status=400)
+
+    positions, errors = split_bulk_items(items)
+    summary = {'inserted': 0, 'errors': []}
+    if positions:
+        try:
+            with span('mongo.write'):
+                insert_many([items[i] for i in positions], chunk_size, summary)
+        except Exception as e:
+            return bulk_insert_failed(items, summary, e)
+    return bulk_insert_result(items, positions, errors, summary)
+
 @method_decorator(csrf_exempt, name='dispatch')
 class CreateView(View):
     def post(self, request):
@@ -122,6 +419,8 @@ class CreateView(View):
         """
         try:
             data = json.loads(request.body)
+            if isinstance(data, list):
+                return bulk_insert_response(request, data, create_many)
             create(data)
             return JsonResponse({'status': 'success', 'message': 'Data inserted successfully'})
         except Exception as e:
@@ -135,11 +434,80 @@ class CreateViewPeertoPeer(View):
         """
         try:
             data = json.loads(request.body)
+            if isinstance(data, list):
+                return bulk_insert_response(request, data, createPeertoPeerMany)
             createPeertoPeer(data)
             return JsonResponse({'status': 'success', 'message': 'Data inserted successfully'})
         except Exception as e:
             return JsonResponse({'status': 'error', 'message': str(e)}, status=500)
 
+def parse_year(value):
+    """
+    Return `value` as an integer year. Booleans and fractional numbers such as
+    2020.7 are rejected instead of being truncated to another record's year.
+    """
+    if isinstance(value, bool) or (isinstance(value, float) and not value.is_integer()):
+        raise ValueError(f"Year must be an integer, got {value!r}")
+    return int(value)
+
+# Generation sources that add up to Total Renewable Energy
+RENEWABLE_COLUMNS = ['Geothermal (GWh)', 'Hydro (GWh)', 'Biomass (GWh)', 'Solar (GWh)', 'Wind (GWh)']
+
+def build_update_pipeline(data):
+    """
+    Build an update pipeline that applies `data` and recomputes the totals on the server.
+
+    The totals are derived from the document as it looks after the new values are
+    set, so a single update_one is atomic and concurrent edits cannot interleave
+    between reading the record and writing the totals.
+
+    Parameters:
+        data (dict): Field values to set.
+
+    Returns:
+        list: Aggregation pipeline stages for update_one/UpdateOne.
+    """
+    # $literal keeps client values from being interpreted as expressions; a body with
+    # nothing to set still recomputes the totals, since $set needs at least one field
+    stages = [{'$set': {field: {'$literal': value} for field, value in data.items()}}] if data else []
+    return stages + [
+        {'$set': {'Total Renewable Energy (GWh)': {'$add': [{'$ifNull': [f'${column}', 0]} for column in RENEWABLE_COLUMNS]}}},
+        {'$set': {'Total Power Generation (GWh)': {'$add': [
+            '$Total Renewable Energy (GWh)',
+            {'$ifNull': ['$Non-Renewable Energy (GWh)', 0]}
+        ]}}}
+    ]
+
+def parse_number(field, value):
+    """
+    Return the value of a numeric field as a number. Comma-formatted strings such
+    as "1,200" are accepted, so the totals can always be added up on the server.
+    """
+    if value is None:
+        return None
+    if isinstance(value, str):
+        try:
+            value = float(value.replace(',', ''))
+        except ValueError:
+            pass
+    if isinstance(value, bool) or not isinstance(value, (int, float)) or not math.isfinite(value):
+        raise ValueError(f"{field} must be a number, got {value!r}")
+    return value
+
+def clean_update_data(data):
+    """
+    Drop fields a client may not overwrite and convert numeric fields to numbers.
+    The Year identifies the record and the totals are always recomputed.
+    Raises ValueError for a body that is not an object or a non-numeric value.
+    """
+    if not isinstance(data, dict):
+        raise ValueError('Expected a JSON object')
+    protected = ('_id', 'Year', 'Total Renewable Energy (GWh)', 'Total Power Generation (GWh)')
+    return {
+        field: parse_number(field, value) if field in NUMERIC_COLUMNS else value
+        for field, value in data.items() if field not in protected
+    }
+
 @require_http_methods(["PUT"])
 @csrf_exempt
 def update_record(request, year):
@@ -148,50 +516,109 @@ def update_record(request, year):
     """
     try:
         data = json.loads(request.body)
+        pipeline = build_update_pipeline(clean_update_data(data))
         collection = connect_to_mongodb()
         
         # Log the incoming data and year
-        logger.debug(f"Updating record for Year: {year} with data: {data}")
+        logger.debug("Updating record for Year: %s with data: %s", year, data)
         
-        # Fetch the existing record
-        existing_record = collection.find_one({"Year": int(year)})
-        if not existing_record:
-            logger.error(f"Record not found for Year: {year}")
-            return JsonResponse({'status': 'error', 'message': 'Record not found'}, status=404)
-        
-        # Calculate the new values for Total Power Generation and Total Renewable Energy
-        total_renewable_energy = (
-            data.get('Geothermal (GWh)', existing_record.get('Geothermal (GWh)', 0)) +
-            existing_record.get('Hydro (GWh)', 0) +
-            existing_record.get('Biomass (GWh)', 0) +
-            existing_record.get('Solar (GWh)', 0) +
-            existing_record.get('Wind (GWh)', 0)
-        )
-        
-        total_power_generation = (
-            total_renewable_energy +
-            data.get('Non-Renewable Energy (GWh)', existing_record.get('Non-Renewable Energy (GWh)', 0))
-        )
-        
-        # Update the data with the new calculated values
-        data['Total Renewable Energy (GWh)'] = total_renewable_energy
-        data['Total Power Generation (GWh)'] = total_power_generation
-        
-        result = collection.update_one(
-            {"Year": int(year)},
-            {"$set": data}
-        )
+        # Set the new values and recompute the totals in one round trip
+        with span('mongo.write'):
+            result = collection.update_one({"Year": int(year)}, pipeline)
         
         if result.matched_count == 0:
             logger.error(f"Record not found for Year: {year}")
             return JsonResponse({'status': 'error', 'message': 'Record not found'}, status=404)
         
+        notify_data_changed()
         logger.info(f"Record updated successfully for Year: {year}")
         return JsonResponse({'status': 'success', 'message': 'Record updated successfully'})
+    except ValueError as e:
+        return JsonResponse({'status': 'error', 'message': str(e)}, status=400)
     except Exception as e:
         logger.error(f"Error updating record: {e}")
         return JsonResponse({'status': 'error', 'message': str(e)}, status=500)
 
+def bulk_write_errors(error):
+    """
+    Return the matched and modified counts and per-item errors of a failed unordered bulk write.
+    The operations that succeeded are already committed.
+    """
+    details = error.details
+    errors = [{'index': e['index'], 'message': e.get('errmsg', str(e))} for e in details.get('writeErrors', [])]
+    return details.get('nMatched', 0), details.get('nModified', 0), errors
+
+def bulk_update_response(total, matched, modified, missing, errors):
+    """
+    Build the response of a bulk update from its counts, missing years and per-item errors.
+    """
+    if not missing and not errors:
+        status, code = 'success', 200
+    elif matched:
+        status, code = 'partial', 207
+    elif errors:
+        status, code = 'error', 400
+    else:
+        status, code = 'error', 404
+    return JsonResponse({
+        'status': status,
+        'message': f"Updated {matched} of {total} records",
+        'matched': matched,
+        'modified': modified,
+        'missing': missing,
+        'errors': errors
+    }, status=code)
+
+@require_http_methods(["PUT"])
+@csrf_exempt
+def update_records(request):
+    """
+    API endpoint to update many records in one bulk write.
+    The body is a JSON array of objects, each with a "Year" and the fields to set.
+    """
+    try:
+        items = json.loads(request.body)
+        if not isinstance(items, list) or not items:
+            return JsonResponse({'status': 'error', 'message': 'Expected a non-empty JSON array'}, status=400)
+        if not all(isinstance(item, dict) and 'Year' in item for item in items):
+            return JsonResponse({'status': 'error', 'message': 'Every item must be an object with a Year'}, status=400)
+        try:
+            years = [parse_year(item['Year']) for item in items]
+        except (ValueError, TypeError):
+            return JsonResponse({'status': 'error', 'message': 'Year must be an integer'}, status=400)
+        
+        collection = connect_to_mongodb()
+        try:
+            pipelines = [build_update_pipeline(clean_update_data(item)) for item in items]
+        except ValueError as e:
+            return JsonResponse({'status': 'error', 'message': str(e)}, status=400)
+        operations = [UpdateOne({"Year": year}, pipeline) for year, pipeline in zip(years, pipelines)]
+        errors = []
+        try:
+            with span('mongo.write'):
+                result = collection.bulk_write(operations, ordered=False)
+            matched, modified = result.matched_count, result.modified_count
+        except BulkWriteError as e:
+            matched, modified, errors = bulk_write_errors(e)
+
+        missing = []
+        if matched + len(errors) < len(operations):
+            # Only look up which years were missing when some update did not match
+            with span('mongo.fetch'):
+                found = set(collection.distinct("Year", {"Year": {"$in": years}}))
+            missing = sorted(set(years) - found)
+
+        if matched:
+            notify_data_changed()
+        logger.info(f"Bulk update matched {matched} of {len(operations)} records with {len(errors)} errors")
+
+        return bulk_update_response(len(operations), matched, modified, missing, errors)
+    except json.JSONDecodeError as e:
+        return JsonResponse({'status': 'error', 'message': str(e)}, status=400)
+    except Exception as e:
+        logger.error(f"Error updating records: {e}")
+        return JsonResponse({'status': 'error', 'message': str(e)}, status=500)
+
 @require_http_methods(["DELETE"])
 @csrf_exempt
 def delete_record(request, year):
@@ -204,15 +631,17 @@ def delete_record(request, year):
         # Log the year of the record to be soft deleted
         logger.debug(f"Soft deleting record for Year: {year}")
         
-        result = collection.update_one(
-            {"Year": int(year)},
-            {"$set": {"isDeleted": True}}
-        )
+        with span('mongo.write'):
+            result = collection.update_one(
+                {"Year": int(year)},
+                {"$set": {"isDeleted": True}}
+            )
         
         if result.matched_count == 0:
             logger.error(f"Record not found for Year: {year}")
             return JsonResponse({'status': 'error', 'message': 'Record not found'}, status=404)
         
+        notify_data_changed()
         logger.info(f"Record soft deleted successfully for Year: {year}")
         return JsonResponse({'status': 'success', 'message': 'Record soft deleted successfully'})
     except Exception as e:
@@ -231,15 +660,17 @@ def recover_record(request, year):
         # Log the year of the record to be recovered
         logger.debug(f"Recovering record for Year: {year}")
         
-        result = collection.update_one(
-            {"Year": int(year)},
-            {"$set": {"isDeleted": False}}
-        )
+        with span('mongo.write'):
+            result = collection.update_one(
+                {"Year": int(year)},
+                {"$set": {"isDeleted": False}}
+            )
         
         if result.matched_count == 0:
             logger.error(f"Record not found for Year: {year}")
             return JsonResponse({'status': 'error', 'message': 'Record not found'}, status=404)
         
+        notify_data_changed()
         logger.info(f"Record recovered successfully for Year: {year}")
         return JsonResponse({'status': 'success', 'message': 'Record recovered successfully'})
     except Exception as e:
@@ -256,38 +687,62 @@ def peertopeer_records(request):
         collection = connect_to_mongodb_peertopeer()
         
         if request.method == 'GET':
-            # Extract parameters
-            start_year = request.GET.get('startYear')
-            end_year = request.GET.get('endYear')
-            
-            # Build query
-            query = {}
-            if start_year and end_year:
-                # Check both year and Year fields to be compatible with different formats
-                start_year = int(start_year)
-                end_year = int(end_year)
-                query = {
-                    "$or": [
-                        {"year": {"$gte": start_year, "$lte": end_year}},
-                        {"Year": {"$gte": start_year, "$lte": end_year}}
-                    ]
-                }
-            
-            # Fetch records
-            records_cursor = collection.find(query)
-            records = []
-            
-            # Process each record
-            for record in records_cursor:
-                # Convert ObjectId to string for JSON serialization
-                record['_id'] = str(record['_id'])
-                records.append(record)
+            with span('mongo.version'):
+                etag = request_etag(request, peertopeer_data_version())
+
+            def build():
+                # Extract parameters
+                start_year = request.GET.get('startYear')
+                end_year = request.GET.get('endYear')
             
-            # Return records as JSON response
-            return JsonResponse({
-                'status': 'success',
-                'records': records
-            })
+                # Build query
+                query = {}
+                if start_year and end_year:
+                    # Check both year and Year fields to be compatible with different formats
+                    start_year = int(start_year)
+                    end_year = int(end_year)
+                    query = {
+                        "$or": [
+                            {"year": {"$gte": start_year, "$lte": end_year}},
+                            {"Year": {"$gte": start_year, "$lte": end_year}}
+                        ]
+                    }
+            
+                # Only fetch the fields the caller asked for
+                projection = parse_fields(request)
+            
+                # Return a single keyset-paginated page when a limit is given
+                limit = parse_page_size(request)
+                if limit is not None:
+                    with span('mongo.fetch'):
+                        records, next_token = paginate(collection, query, limit, after=request.GET.get('after'), projection=projection)
+                    return JsonResponse({
+                        'status': 'success',
+                        'records': records,
+                        'next': next_token
+                    })
+            
+                # Stream large result sets instead of building them in memory
+                if wants_stream(request):
+                    return stream_records(collection.find(query, projection))
+            
+                # Fetch records
+                with span('mongo.fetch'):
+                    records = list(collection.find(query, projection))
+            
+                with span('serialize'):
+                    # Process each record
+                    for record in records:
+                        # Convert ObjectId to string for JSON serialization
+                        record['_id'] = str(record['_id'])
+            
+                    # Return records as JSON response
+                    return JsonResponse({
+                        'status': 'success',
+                        'records': records
+                    })
+
+            return conditional_response(request, etag, build)
             
         elif request.method == 'POST':
             # Parse request body
@@ -295,6 +750,7 @@ def peertopeer_records(request):
             
             # Insert new record
             result = collection.insert_one(data)
+            notify_peertopeer_changed()
             
             # Return success response with new record ID
             return JsonResponse({
@@ -309,6 +765,12 @@ def peertopeer_records(request):
                 'message': 'Method not allowed'
             }, status=405)
             
+    except ValueError as e:
+        # Malformed parameters such as a bad limit or cursor
+        return JsonResponse({
+            'status': 'error',
+            'message': str(e)
+        }, status=400)
     except Exception as e:
         # Log the error
         import logging
@@ -333,28 +795,35 @@ def peertopeer_record_detail(request, record_id):
         object_id = ObjectId(record_id)
         
         if request.method == 'GET':
-            # Fetch record
-            record = collection.find_one({'_id': object_id})
+            with span('mongo.version'):
+                etag = request_etag(request, peertopeer_data_version())
+
+            def build():
+                # Fetch record, optionally limited to the requested fields
+                with span('mongo.fetch'):
+                    record = collection.find_one({'_id': object_id}, parse_fields(request))
             
-            if not record:
-                return JsonResponse({
-                    'status': 'error',
-                    'message': 'Record not found'
-                }, status=404)
+                if not record:
+                    return JsonResponse({
+                        'status': 'error',
+                        'message': 'Record not found'
+                    }, status=404)
                 
-            # Convert ObjectId to string for JSON serialization
-            record['_id'] = str(record['_id'])
+                # Convert ObjectId to string for JSON serialization
+                record['_id'] = str(record['_id'])
             
-            # Return record as JSON response
-            return JsonResponse({
-                'status': 'success',
-                'record': record
-            })
+                # Return record as JSON response
+                return JsonResponse({
+                    'status': 'success',
+                    'record': record
+                })
+
+            return conditional_response(request, etag, build)
             
         elif request.method == 'PUT' or request.method == 'PATCH':
             # Parse request body
-            print(f"Processing PUT request for record {record_id}")
-            print(f"Request body: {request.body}")
+            logger.debug(f"Processing PUT request for record {record_id}")
+            logger.debug("Request body: %s", request.body)
             
             data = json.loads(request.body)
             
@@ -363,7 +832,7 @@ def peertopeer_record_detail(request, record_id):
                 del data['_id']
             
             # Log the update operation
-            logger.debug(f"Updating record {record_id} with data: {data}")
+            logger.debug("Updating record %s with data: %s", record_id, data)
                 
             # Update record
             result = collection.update_one({'_id': object_id}, {'$set': data})
@@ -373,6 +842,7 @@ def peertopeer_record_detail(request, record_id):
                     'status': 'error',
                     'message': 'Record not found'
                 }, status=404)
+            notify_peertopeer_changed()
                 
             # Return success response
             return JsonResponse({
@@ -389,6 +859,7 @@ def peertopeer_record_detail(request, record_id):
                     'status': 'error',
                     'message': 'Record not found'
                 }, status=404)
+            notify_peertopeer_changed()
                 
             # Return success response
             return JsonResponse({
@@ -402,6 +873,12 @@ def peertopeer_record_detail(request, record_id):
                 'message': 'Method not allowed'
             }, status=405)
             
+    except ValueError as e:
+        # Malformed parameters such as an invalid field name
+        return JsonResponse({
+            'status': 'error',
+            'message': str(e)
+        }, status=400)
     except Exception as e:
         # Log the error
         logger.error(f"Error in peertopeer_record_detail: {str(e)}")
@@ -423,28 +900,52 @@ def add_recommendation(request):
         collection = connect_to_mongodb_recommendation()
         
         if request.method == 'GET':
-            # Extract parameters for potential filtering
-            year = request.GET.get('year')
+            with span('mongo.version'):
+                etag = request_etag(request, recommendation_data_version())
+
+            def build():
+                # Extract parameters for potential filtering
+                year = request.GET.get('year')
             
-            # Build query
-            query = {}
-            if year:
-                query["Year"] = int(year)
+                # Build query
+                query = {}
+                if year:
+                    query["Year"] = int(year)
             
-            # Fetch records
-            records_cursor = collection.find(query)
-            records = []
+                # Only fetch the fields the caller asked for
+                projection = parse_fields(request)
             
-            # Process each record
-            for record in records_cursor:
-                # Convert ObjectId to string for JSON serialization
-                record['_id'] = str(record['_id'])
-                records.append(record)
+                # Return a single keyset-paginated page ordered by (Year, _id) when a limit is given
+                limit = parse_page_size(request)
+                if limit is not None:
+                    with span('mongo.fetch'):
+                        records, next_token = paginate(collection, query, limit, after=request.GET.get('after'), order_field='Year', projection=projection)
+                    return JsonResponse({
+                        'status': 'success',
+                        'records': records,
+                        'next': next_token
+                    })
             
-            return JsonResponse({
-                'status': 'success',
-                'records': records
-            })
+                # Stream large result sets instead of building them in memory
+                if wants_stream(request):
+                    return stream_records(collection.find(query, projection))
+            
+                # Fetch records
+                with span('mongo.fetch'):
+                    records = list(collection.find(query, projection))
+            
+                with span('serialize'):
+                    # Process each record
+                    for record in records:
+                        # Convert ObjectId to string for JSON serialization
+                        record['_id'] = str(record['_id'])
+                
+                    return JsonResponse({
+                        'status': 'success',
+                        'records': records
+                    })
+
+            return conditional_response(request, etag, build)
             
         elif request.method == 'POST':
             # Parse request body
@@ -456,6 +957,7 @@ def add_recommendation(request):
                 
             # Insert new record
             result = collection.insert_one(data)
+            notify_recommendation_changed()
             
             # Return success response with new record ID
             return JsonResponse({
@@ -470,6 +972,12 @@ def add_recommendation(request):
                 'message': 'Method not allowed'
             }, status=405)
             
+    except ValueError as e:
+        # Malformed parameters such as a bad limit or cursor
+        return JsonResponse({
+            'status': 'error',
+            'message': str(e)
+        }, status=400)
     except Exception as e:
         # Log the error
         logger.error(f"Error in recommendation_records: {str(e)}")
@@ -493,23 +1001,30 @@ def recommendation_record_detail(request, record_id):
         object_id = ObjectId(record_id)
         
         if request.method == 'GET':
-            # Fetch record
-            record = collection.find_one({'_id': object_id})
+            with span('mongo.version'):
+                etag = request_etag(request, recommendation_data_version())
+
+            def build():
+                # Fetch record, optionally limited to the requested fields
+                with span('mongo.fetch'):
+                    record = collection.find_one({'_id': object_id}, parse_fields(request))
             
-            if not record:
-                return JsonResponse({
-                    'status': 'error',
-                    'message': 'Recommendation record not found'
-                }, status=404)
+                if not record:
+                    return JsonResponse({
+                        'status': 'error',
+                        'message': 'Recommendation record not found'
+                    }, status=404)
                 
-            # Convert ObjectId to string for JSON serialization
-            record['_id'] = str(record['_id'])
+                # Convert ObjectId to string for JSON serialization
+                record['_id'] = str(record['_id'])
             
-            # Return record as JSON response
-            return JsonResponse({
-                'status': 'success',
-                'record': record
-            })
+                # Return record as JSON response
+                return JsonResponse({
+                    'status': 'success',
+                    'record': record
+                })
+
+            return conditional_response(request, etag, build)
             
         elif request.method == 'PUT' or request.method == 'PATCH':
             # Parse request body
@@ -525,7 +1040,7 @@ def recommendation_record_detail(request, record_id):
                 data['Year'] = int(data['Year'])
             
             # Log the update operation
-            logger.debug(f"Updating recommendation record {record_id} with data: {data}")
+            logger.debug("Updating recommendation record %s with data: %s", record_id, data)
                 
             # Update record
             result = collection.update_one({'_id': object_id}, {'$set': data})
@@ -535,6 +1050,7 @@ def recommendation_record_detail(request, record_id):
                     'status': 'error',
                     'message': 'Recommendation record not found'
                 }, status=404)
+            notify_recommendation_changed()
                 
             # Return success response
             return JsonResponse({
@@ -551,6 +1067,7 @@ def recommendation_record_detail(request, record_id):
                     'status': 'error',
                     'message': 'Recommendation record not found'
                 }, status=404)
+            notify_recommendation_changed()
                 
             # Return success response
             return JsonResponse({
@@ -564,6 +1081,12 @@ def recommendation_record_detail(request, record_id):
                 'message': 'Method not allowed'
             }, status=405)
             
+    except ValueError as e:
+        # Malformed parameters such as an invalid field name
+        return JsonResponse({
+            'status': 'error',
+            'message': str(e)
+        }, status=400)
     except Exception as e:
         # Log the error
         logger.error(f"Error in recommendation_record_detail: {str(e)}")
@@ -59,7 +59,7 @@ CORS_ALLOW_HEADERS = [
 CSRF_TRUSTED_ORIGINS = [
     'http://localhost:5173',
     'http://localhost:5000',
-    'ecopulsebackend.onrender.com'
+    'https://ecopulsebackend.onrender.com'
 ]
 
 
@@ -80,8 +80,9 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'corsheaders.middleware.CorsMiddleware',  # Add CORS middleware at the top
+    'api.middleware.TracingMiddleware',  # Per-request timing spans (Server-Timing header + one log line)
     'django.middleware.security.SecurityMiddleware',
-    'whitenoise.middleware.WhiteNoiseMiddleware',
+    'api.middleware.AsyncWhiteNoiseMiddleware',  # WhiteNoise that stays async under ASGI
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -160,7 +161,7 @@ CORS_ALLOWED_ORIGINS = [
     'https://ecopulse.up.railway.app',  # Add this one
     'https://django-server-production-dac6.up.railway.app',
     'http://localhost:5000',
-    'ecopulsebackend.onrender.com'
+    'https://ecopulsebackend.onrender.com'
 ]
 
 CORS_ALLOW_CREDENTIALS = True
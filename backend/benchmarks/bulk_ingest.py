@@ -0,0 +1,62 @@
+"""
+Benchmark bulk ingest against the single-insert path.
+
+Writes synthetic yearly documents into a scratch collection (dropped
+afterwards) on the database configured by MONGO_URL. It compares one
+insert_one per document, which is what one create request per document
+costs, with insert_many_chunked at a few chunk sizes.
+
+Run from the backend directory:
+    python -m benchmarks.bulk_ingest --count 2000
+"""
+import argparse
+import logging
+import time
+
+logging.disable(logging.WARNING)
+
+from mongodb import get_collection, insert_many_chunked
+
+SCRATCH_COLLECTION = "benchmark_ingest"
+
+def make_documents(count):
+    return [
+        {
+            'Year': 1900 + i,
+            'Geothermal (GWh)': 10000.0 + i,
+            'Hydro (GWh)': 8000.0 + i,
+            'Population (in millions)': 80.0 + i / 100,
+            'isPredicted': False
+        }
+        for i in range(count)
+    ]
+
+def single_inserts(collection, documents):
+    for document in documents:
+        collection.insert_one(document)
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare single-document inserts with chunked bulk inserts.")
+    parser.add_argument('--count', type=int, default=2000, help="Documents written per run")
+    parser.add_argument('--chunk-sizes', type=int, nargs='+', default=[100, 500, 1000], help="Bulk chunk sizes to try")
+    args = parser.parse_args()
+
+    collection = get_collection(SCRATCH_COLLECTION)
+    runs = [('insert_one per document', lambda docs: single_inserts(collection, docs))]
+    for chunk_size in args.chunk_sizes:
+        runs.append((f'insert_many chunk={chunk_size}', lambda docs, size=chunk_size: insert_many_chunked(collection, docs, size)))
+
+    print(f"{'implementation':<28}{'seconds':>10}{'docs/s':>12}")
+    try:
+        for name, run in runs:
+            collection.drop()
+            documents = make_documents(args.count)
+            start = time.perf_counter()
+            run(documents)
+            elapsed = time.perf_counter() - start
+            print(f"{name:<28}{elapsed:>10.3f}{args.count / elapsed:>12.0f}")
+    finally:
+        collection.drop()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+Benchmark how get_peer_to_predictions assembles its results.
+
+Compares the previous per-row DataFrame + pd.concat assembly with the columnar
+builder, both as a DataFrame and as JSON records, reporting wall time and
+peak traced memory for a few year ranges.
+
+Run from the backend directory:
+    python -m benchmarks.peertopeer_results
+"""
+import logging
+import time
+import tracemalloc
+import numpy as np
+import pandas as pd
+
+logging.disable(logging.WARNING)
+
+import peertopeer
+
+def legacy_peer_to_predictions(start_year, end_year):
+    """
+    The previous assembly strategy: one single-row DataFrame per prediction, concatenated at the end.
+    """
+    state = peertopeer.get_forecast_state()
+    years = np.arange(start_year, end_year + 1)
+    forecast = peertopeer.forecast_from_table(state['forecast_table'], years)
+    index = state['forecast_index']
+    gen_index = index.get(peertopeer.visayas_gen_column)
+    consumption_index = index.get(peertopeer.visayas_consumption_column)
+    all_predictions = []
+    for year, row in zip(years.tolist(), forecast):
+        for place, df_place in state['subgrid_data'].items():
+            if 'Total Power Generation (GWh)' in df_place.columns:
+                power_generation = row[index[f'{place} Total Power Generation (GWh)']]
+                all_predictions.append(pd.DataFrame({
+                    'Year': [year],
+                    'Place': [place],
+                    'Energy Type': ['Total Power Generation (GWh)'],
+                    'Predicted Value': [power_generation]
+                }))
+                if gen_index is not None and consumption_index is not None and row[gen_index] != 0:
+                    all_predictions.append(pd.DataFrame({
+                        'Year': [year],
+                        'Place': [place],
+                        'Energy Type': [f'{place} Estimated Consumption (GWh)'],
+                        'Predicted Value': [power_generation / row[gen_index] * row[consumption_index]]
+                    }))
+            for metric in peertopeer.metrics:
+                if metric in df_place.columns:
+                    all_predictions.append(pd.DataFrame({
+                        'Year': [year],
+                        'Place': [place],
+                        'Energy Type': [metric],
+                        'Predicted Value': [row[index[f'{place} {metric}']]]
+                    }))
+    return pd.concat(all_predictions, ignore_index=True).to_dict(orient='records')
+
+def measure(func, *args, repeat=5):
+    """
+    Return (best wall time in ms, peak traced memory in KiB) over `repeat` runs.
+    """
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(*args)
+        best = min(best, time.perf_counter() - start)
+    tracemalloc.start()
+    func(*args)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return best * 1000, peak / 1024
+
+def main():
+    candidates = [
+        ('legacy concat -> records', legacy_peer_to_predictions),
+        ('columnar -> DataFrame', peertopeer.get_peer_to_predictions),
+        ('columnar -> records', peertopeer.get_peer_to_prediction_records)
+    ]
+    print(f"{'range':<12}{'implementation':<28}{'time (ms)':>12}{'peak (KiB)':>14}")
+    for start_year, end_year in [(2026, 2026), (2020, 2040), (2000, 2100)]:
+        for name, func in candidates:
+            elapsed, peak = measure(func, start_year, end_year)
+            print(f"{f'{start_year}-{end_year}':<12}{name:<28}{elapsed:>12.2f}{peak:>14.1f}")
+
+if __name__ == "__main__":
+    main()
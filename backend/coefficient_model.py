@@ -0,0 +1,104 @@
+import os
+import json
+import glob
+import tempfile
+import argparse
+import logging
+import numpy as np
+from model_registry import file_digest
+
+# Configure the logger
+logger = logging.getLogger(__name__)
+
+# Coefficient files sit next to the pickles they were exported from
+COEFFICIENT_SUFFIX = '.coef.json'
+
+class LinearCoefficients:
+    """
+    A fitted linear model reduced to its coefficients and intercept.
+
+    predict() matches LinearRegression.predict for the same inputs but only
+    needs numpy, so serving a model does not unpickle scikit-learn objects.
+    source_sha256 is the digest of the pickle the coefficients were exported from.
+    """
+
+    def __init__(self, features, coef, intercept, source_sha256=None):
+        self.features = list(features)
+        self.coef_ = np.asarray(coef, dtype=float)
+        self.intercept_ = float(intercept)
+        self.source_sha256 = source_sha256
+
+    @classmethod
+    def from_model(cls, model, features, source_sha256=None):
+        """
+        Extract the coefficients of a fitted single-output LinearRegression.
+        """
+        return cls(features, model.coef_, model.intercept_, source_sha256)
+
+    def predict(self, X):
+        """
+        Score rows of X, a 2-D array or DataFrame with columns in self.features order.
+        """
+        if hasattr(X, 'columns') and list(X.columns) != self.features:
+            raise ValueError(f"Expected features {self.features}, got {list(X.columns)}")
+        return np.asarray(X, dtype=float) @ self.coef_ + self.intercept_
+
+    def to_dict(self):
+        return {
+            'features': self.features,
+            'coef': self.coef_.tolist(),
+            'intercept': self.intercept_,
+            'source_sha256': self.source_sha256
+        }
+
+def coefficient_path(model_path):
+    """
+    Return the coefficient file that belongs to a pickled model artifact.
+    """
+    return os.path.splitext(model_path)[0] + COEFFICIENT_SUFFIX
+
+def save_coefficients(coefficients, path):
+    """
+    Write coefficients as JSON, atomically. Floats are stored with repr, so they round-trip exactly.
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w') as f:
+            json.dump(coefficients.to_dict(), f, indent=2)
+        os.replace(tmp_path, path)
+    except Exception:
+        os.remove(tmp_path)
+        raise
+
+def load_coefficients(path):
+    """
+    Load a coefficient file written by save_coefficients.
+    """
+    with open(path) as f:
+        data = json.load(f)
+    return LinearCoefficients(data['features'], data['coef'], data['intercept'], data.get('source_sha256'))
+
+def export_coefficients(model_path, features):
+    """
+    Export the coefficient file for a pickled LinearRegression and return its path.
+    """
+    import joblib
+    model = joblib.load(model_path)
+    path = coefficient_path(model_path)
+    save_coefficients(LinearCoefficients.from_model(model, features, file_digest(model_path)), path)
+    logger.info(f"Exported coefficients of {model_path} to {path}")
+    return path
+
+def main():
+    from model_training import TRAINING_FEATURES
+    bundled = sorted(glob.glob(os.path.join(os.path.dirname(os.path.abspath(__file__)), '*_model.pkl')))
+    parser = argparse.ArgumentParser(description="Export pickled linear models to coefficient files.")
+    parser.add_argument('models', nargs='*', default=bundled, help="Pickled models to export (defaults to the bundled artifacts)")
+    args = parser.parse_args()
+    for model_path in args.models:
+        print(f"{model_path} -> {export_coefficients(model_path, TRAINING_FEATURES)}")
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    main()
@@ -0,0 +1,143 @@
+import os
+import json
+import glob
+import shutil
+import tempfile
+import argparse
+import logging
+import numpy as np
+import pandas as pd
+from sidecar_cache import CACHE_DIR
+
+# Configure the logger
+logger = logging.getLogger(__name__)
+
+# Columnar copies of the Excel datasets live under the shared cache directory
+EXCEL_CACHE_DIR = os.path.join(CACHE_DIR, 'excel')
+
+# Excel sources shipped with the backend
+script_dir = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_SOURCES = [
+    os.path.join(script_dir, 'peertopeer.xlsx'),
+    os.path.join(script_dir, 'EcoPulse-Data.xlsx')
+]
+
+# Column dtypes numpy can store and memory-map as-is
+NATIVE_KINDS = 'biufM'
+
+def _cache_path(source_path, cache_dir=EXCEL_CACHE_DIR):
+    """
+    Return the cache directory for the current version of a source file.
+    The source's mtime and size are part of the name, so a changed file
+    never matches a stale cache.
+    """
+    stat = os.stat(source_path)
+    name = os.path.basename(source_path)
+    return os.path.join(cache_dir, f'{name}-{stat.st_mtime_ns}-{stat.st_size}')
+
+def build_excel_cache(source_path, cache_dir=EXCEL_CACHE_DIR):
+    """
+    Parse an Excel file once and store every column as its own .npy file.
+
+    Numeric and datetime columns are saved with their native dtype. Other
+    columns are saved as unicode arrays with a separate null mask.
+
+    Returns:
+        str: The cache directory that was written.
+    """
+    target = _cache_path(source_path, cache_dir)
+    df = pd.read_excel(source_path)
+
+    os.makedirs(cache_dir, exist_ok=True)
+    # Build in a temporary directory and rename it into place so readers never see a partial cache
+    tmp_dir = tempfile.mkdtemp(dir=cache_dir, suffix='.tmp')
+    try:
+        columns = []
+        for i, name in enumerate(df.columns):
+            values = df[name].to_numpy()
+            column = {'name': str(name), 'file': f'col_{i}.npy', 'mask': None, 'pickled': False}
+            nulls = pd.isna(values)
+            if values.dtype.kind not in NATIVE_KINDS and not all(isinstance(v, str) for v in values[~nulls]):
+                # Mixed-type columns keep their Python objects and are loaded without mmap
+                values = values.astype(object)
+                column['pickled'] = True
+            elif values.dtype.kind not in NATIVE_KINDS:
+                values = np.where(nulls, '', values.astype(str)).astype(str)
+                if nulls.any():
+                    column['mask'] = f'col_{i}.mask.npy'
+                    np.save(os.path.join(tmp_dir, column['mask']), nulls)
+            np.save(os.path.join(tmp_dir, column['file']), values, allow_pickle=column['pickled'])
+            columns.append(column)
+
+        with open(os.path.join(tmp_dir, 'meta.json'), 'w') as f:
+            json.dump({'source': os.path.basename(source_path), 'rows': len(df), 'columns': columns}, f)
+
+        if os.path.isdir(target):
+            shutil.rmtree(target)
+        os.replace(tmp_dir, target)
+    except Exception:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        raise
+
+    # Remove caches of older versions of the same source
+    for stale_path in glob.glob(os.path.join(cache_dir, f'{glob.escape(os.path.basename(source_path))}-*')):
+        if stale_path != target and not stale_path.endswith('.tmp'):
+            shutil.rmtree(stale_path, ignore_errors=True)
+
+    logger.info(f"Built columnar cache for {source_path} at {target}")
+    return target
+
+def _load_excel_cache(path):
+    """
+    Load a columnar cache directory into a DataFrame, memory-mapping each column.
+    """
+    with open(os.path.join(path, 'meta.json')) as f:
+        meta = json.load(f)
+
+    data = {}
+    for column in meta['columns']:
+        if column['pickled']:
+            data[column['name']] = np.load(os.path.join(path, column['file']), allow_pickle=True)
+            continue
+        values = np.load(os.path.join(path, column['file']), mmap_mode='r')
+        if values.dtype.kind not in NATIVE_KINDS:
+            values = values.astype(object)
+            if column['mask']:
+                values[np.load(os.path.join(path, column['mask']))] = np.nan
+        data[column['name']] = values
+    return pd.DataFrame(data, copy=False)
+
+def read_excel_cached(source_path, cache_dir=EXCEL_CACHE_DIR):
+    """
+    Drop-in replacement for pd.read_excel(source_path) backed by a columnar cache.
+
+    The first call for a given version of the file parses it and writes the
+    cache; later calls memory-map the cached columns instead of parsing Excel.
+    Numeric columns are read-only views of the cache; copy before writing in place.
+    """
+    path = _cache_path(source_path, cache_dir)
+    if os.path.isfile(os.path.join(path, 'meta.json')):
+        try:
+            return _load_excel_cache(path)
+        except Exception as e:
+            logger.warning(f"Rebuilding unreadable columnar cache {path}: {e}")
+
+    try:
+        path = build_excel_cache(source_path, cache_dir)
+    except OSError as e:
+        # A read-only deployment still works, it just parses Excel every time
+        logger.warning(f"Could not write columnar cache for {source_path}: {e}")
+        return pd.read_excel(source_path)
+    return _load_excel_cache(path)
+
+def main():
+    parser = argparse.ArgumentParser(description="Rebuild the columnar caches of the Excel datasets.")
+    parser.add_argument('sources', nargs='*', default=DEFAULT_SOURCES, help="Excel files to convert (defaults to the bundled datasets)")
+    args = parser.parse_args()
+    for source_path in args.sources:
+        path = build_excel_cache(source_path)
+        print(f"{source_path} -> {path}")
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    main()
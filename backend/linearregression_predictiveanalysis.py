@@ -2,16 +2,20 @@
 import os
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
-from sklearn.model_selection import train_test_split
-from sklearn.linear_model import LinearRegression
-from sklearn.metrics import mean_absolute_error, mean_squared_error
-import joblib
 import logging
-from pymongo import MongoClient
 from dotenv import load_dotenv
-from pymongo.errors import ConnectionFailure
-import time
+import asyncio
+import threading
+import weakref
+from pymongo.errors import OperationFailure
+from mongodb import get_collection, get_data_version, bump_data_version, insert_many_chunked
+from mongodb import get_async_collection, get_data_version_async, bump_data_version_async, insert_many_chunked_async
+from model_registry import ModelRegistry, cached_file_digest
+from coefficient_model import load_coefficients, coefficient_path
+from response_cache import ResponseCache
+from model_store import current_version, current_model_dir
+from model_training import model_filename, train_models, TRAINING_TARGETS, TRAINING_FEATURES
+from tracing import span, traced
 
 # Load environment variables from .env file
 load_dotenv()
@@ -21,30 +25,94 @@ logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 # MongoDB connection
-MONGO_URL = os.getenv("MONGO_URL")  # Load MongoDB URI from environment variables
-DATABASE_NAME = "ecopulse"  # Replace with your database name
 COLLECTION_NAME = "predictiveAnalysis"  # Replace with your collection name
 
-def connect_to_mongodb(retries=3, delay=5):
+# Models are loaded once per process and reloaded only when the artifact changes.
+# Coefficient files are preferred; pickles are the fallback for models without one.
+model_registry = ModelRegistry()
+coefficient_registry = ModelRegistry(loader=load_coefficients)
+_served_model_dir = {'path': None}
+_stale_coefficients = set()
+
+# Serialized prediction responses, keyed by data and model version and request parameters
+forecast_cache = ResponseCache()
+
+# Preprocessed DataFrame cached per process as one (version, df) entry, keyed by the
+# collection's data version. The entry is swapped in a single assignment so it can be
+# read without a lock; the locks only make concurrent misses share one fetch.
+_data_cache = {'entry': None}
+_data_cache_lock = threading.Lock()
+_async_data_cache_locks = weakref.WeakKeyDictionary()
+
+# Numeric fields stored in the collection, sometimes as comma-formatted strings
+NUMERIC_COLUMNS = [
+    "Total Renewable Energy (GWh)",
+    "Geothermal (GWh)",
+    "Hydro (GWh)",
+    "Biomass (GWh)",
+    "Solar (GWh)",
+    "Wind (GWh)",
+    "Non-Renewable Energy (GWh)",
+    "Total Power Generation (GWh)",
+    "Population (in millions)",
+    "Gross Domestic Product"
+]
+
+# Only the fields forecasting needs are fetched; the order of NUMERIC_COLUMNS doesn't matter
+# because MongoDB returns projected fields in the stored document order
+DATA_PROJECTION = {field: 1 for field in ['Year'] + NUMERIC_COLUMNS + ['Latitude', 'Longitude']}
+DATA_PROJECTION['_id'] = 0
+
+def _numeric_expression(field):
+    # Strip thousands separators from strings, then convert; unparsable values become null
+    value = f'${field}'
+    return {'$convert': {
+        'input': {'$cond': [
+            {'$eq': [{'$type': value}, 'string']},
+            {'$replaceAll': {'input': value, 'find': ',', 'replacement': ''}},
+            value
+        ]},
+        'to': 'double',
+        'onError': None,
+        'onNull': None
+    }}
+
+# Same fields as DATA_PROJECTION, with the numeric ones converted to doubles by the server
+TYPED_LOAD_PIPELINE = [{'$project': {
+    '_id': 0, 'Year': 1, 'Latitude': 1, 'Longitude': 1,
+    **{col: _numeric_expression(col) for col in NUMERIC_COLUMNS}
+}}]
+
+# "aggregate" converts numeric fields in MongoDB ($replaceAll needs MongoDB 4.4+);
+# "python" fetches raw documents and converts them with pandas
+PREDICTIVE_LOAD_MODE = os.getenv("PREDICTIVE_LOAD_MODE", "aggregate")
+_load_mode = {'mode': PREDICTIVE_LOAD_MODE}
+
+# Server errors meaning the typed pipeline is unsupported (InvalidPipelineOperator and
+# the unrecognized expression error of older servers); anything else is re-raised
+UNSUPPORTED_PIPELINE_CODES = (168, 31325)
+
+def _typed_load_failed(e):
     """
-    Connect to MongoDB Atlas and return the collection.
-    Retries the connection in case of failure.
+    Switch this process to the Python load path if the server does not support
+    the typed pipeline. Transient failures such as timeouts are re-raised.
     """
-    for attempt in range(retries):
-        try:
-            client = MongoClient(MONGO_URL, serverSelectionTimeoutMS=5000)
-            db = client[DATABASE_NAME]
-            collection = db[COLLECTION_NAME]
-            # Attempt to ping the server to check the connection
-            client.admin.command('ping')
-            logger.debug("Connected to MongoDB Atlas successfully.")
-            return collection
-        except ConnectionFailure as e:
-            logger.error(f"Error connecting to MongoDB (attempt {attempt + 1}): {e}")
-            if attempt < retries - 1:
-                time.sleep(delay)
-            else:
-                raise
+    if e.code not in UNSUPPORTED_PIPELINE_CODES:
+        raise e
+    logger.warning(f"Typed aggregation load is not supported, converting in Python from now on: {e}")
+    _load_mode['mode'] = 'python'
+
+def connect_to_mongodb():
+    """
+    Return the predictiveAnalysis collection from the shared, pooled MongoDB client.
+    """
+    return get_collection(COLLECTION_NAME)
+
+def connect_to_mongodb_async():
+    """
+    Return the predictiveAnalysis collection from the async client of the running event loop.
+    """
+    return get_async_collection(COLLECTION_NAME)
 
 def create(data):
     """
@@ -55,54 +123,231 @@ def create(data):
         # Add the isPredicted flag for actual data
         data['isPredicted'] = False
         collection.insert_one(data)
+        notify_data_changed()
         logger.info("Actual data inserted successfully.")
     except Exception as e:
         logger.error(f"Error inserting actual data: {e}")
         raise
 
-def load_and_preprocess_data():
+def create_many(documents, chunk_size=None, summary=None):
     """
-    Load the dataset from MongoDB and preprocess it by handling missing values.
+    Insert many actual data documents into MongoDB with unordered bulk writes.
+    Returns the insert_many_chunked summary of inserted documents and per-item errors.
+    The data version is bumped whenever anything was written, even if a later chunk raised.
     """
+    summary = summary if summary is not None else {'inserted': 0, 'errors': []}
     try:
         collection = connect_to_mongodb()
-        # Fetch all documents from the collection
-        data = list(collection.find({}))
-        logger.debug(f"Fetched data: {data}")  # Add detailed logging
-        # Convert the data to a pandas DataFrame
-        df = pd.DataFrame(data)
-        # Convert numeric fields from strings to numbers
-        numeric_columns = [
-            "Total Renewable Energy (GWh)",
-            "Geothermal (GWh)",
-            "Hydro (GWh)",
-            "Biomass (GWh)",
-            "Solar (GWh)",
-            "Wind (GWh)",
-            "Non-Renewable Energy (GWh)",
-            "Total Power Generation (GWh)",
-            "Population (in millions)",
-            "Gross Domestic Product"
-        ]
-        for col in numeric_columns:
+        for data in documents:
+            # Add the isPredicted flag for actual data
+            data['isPredicted'] = False
+        insert_many_chunked(collection, documents, chunk_size, summary)
+        logger.info(f"Bulk inserted {summary['inserted']} of {len(documents)} actual data documents.")
+        return summary
+    except Exception as e:
+        logger.error(f"Error bulk inserting actual data after {summary['inserted']} documents: {e}")
+        raise
+    finally:
+        if summary['inserted']:
+            notify_data_changed()
+
+async def create_async(data):
+    """
+    Async counterpart of create for ASGI views.
+    """
+    try:
+        collection = connect_to_mongodb_async()
+        # Add the isPredicted flag for actual data
+        data['isPredicted'] = False
+        await collection.insert_one(data)
+        await notify_data_changed_async()
+        logger.info("Actual data inserted successfully.")
+    except Exception as e:
+        logger.error(f"Error inserting actual data: {e}")
+        raise
+
+async def create_many_async(documents, chunk_size=None, summary=None):
+    """
+    Async counterpart of create_many for ASGI views.
+    """
+    summary = summary if summary is not None else {'inserted': 0, 'errors': []}
+    try:
+        collection = connect_to_mongodb_async()
+        for data in documents:
+            # Add the isPredicted flag for actual data
+            data['isPredicted'] = False
+        await insert_many_chunked_async(collection, documents, chunk_size, summary)
+        logger.info(f"Bulk inserted {summary['inserted']} of {len(documents)} actual data documents.")
+        return summary
+    except Exception as e:
+        logger.error(f"Error bulk inserting actual data after {summary['inserted']} documents: {e}")
+        raise
+    finally:
+        if summary['inserted']:
+            await notify_data_changed_async()
+
+def _clear_data_cache():
+    _data_cache['entry'] = None
+    forecast_cache.clear()
+
+def _cached_frame(version):
+    """
+    Return the cached DataFrame if it was built for `version`, else None.
+    """
+    entry = _data_cache['entry']
+    if entry is not None and entry[0] == version:
+        logger.debug(f"Using cached data for version {version}")
+        return entry[1]
+    return None
+
+def _async_data_cache_lock():
+    # asyncio locks belong to one event loop, so each loop gets its own
+    loop = asyncio.get_running_loop()
+    lock = _async_data_cache_locks.get(loop)
+    if lock is None:
+        lock = _async_data_cache_locks[loop] = asyncio.Lock()
+    return lock
+
+def current_data_version():
+    """
+    Return the predictiveAnalysis data version, which changes after every write.
+    """
+    return get_data_version(COLLECTION_NAME)
+
+async def current_data_version_async():
+    """
+    Async counterpart of current_data_version.
+    """
+    return await get_data_version_async(COLLECTION_NAME)
+
+def notify_data_changed():
+    """
+    Bump the predictiveAnalysis data version after a write.
+    Every worker rebuilds its cached DataFrame and forecast responses on the next read.
+    """
+    bump_data_version(COLLECTION_NAME)
+    _clear_data_cache()
+
+async def notify_data_changed_async():
+    """
+    Async counterpart of notify_data_changed.
+    """
+    await bump_data_version_async(COLLECTION_NAME)
+    _clear_data_cache()
+
+def _fetch_and_preprocess_data():
+    """
+    Fetch the whole collection from MongoDB and clean it into a DataFrame.
+    """
+    collection = connect_to_mongodb()
+    # Fetch all documents from the collection
+    if _load_mode['mode'] == 'aggregate':
+        try:
+            with span('mongo.fetch'):
+                data = list(collection.aggregate(TYPED_LOAD_PIPELINE))
+            return _preprocess_data(data, typed=True)
+        except OperationFailure as e:
+            _typed_load_failed(e)
+    with span('mongo.fetch'):
+        data = list(collection.find({}, DATA_PROJECTION))
+    logger.debug("Fetched data: %s", data)  # Formatted only when debug logging is enabled
+    return _preprocess_data(data)
+
+@traced('preprocess')
+def _preprocess_data(data, typed=False):
+    """
+    Clean raw predictiveAnalysis documents into a DataFrame.
+
+    Parameters:
+        data (list): Documents fetched from the collection.
+        typed (bool): True when the numeric fields were already converted by TYPED_LOAD_PIPELINE.
+    """
+    # Convert the data to a pandas DataFrame
+    df = pd.DataFrame(data)
+    # Convert numeric fields from strings to numbers
+    if not typed:
+        for col in NUMERIC_COLUMNS:
             if df[col].dtype == 'object':
-                df[col] = pd.to_numeric(df[col].str.replace(",", ""), errors="coerce")
-        # Forward fill missing values
-        df = df.ffill()  # Use ffill() instead of fillna(method="ffill")
-        # Ensure coordinates are included
-        if 'Latitude' in df.columns and 'Longitude' in df.columns:
-            df['coordinates'] = df.apply(lambda row: {'lat': row['Latitude'], 'lng': row['Longitude']}, axis=1)
-        else:
-            df['coordinates'] = None
-        return df
+                # Only strings carry separators; values already stored as numbers are kept
+                df[col] = pd.to_numeric(df[col].str.replace(",", "").fillna(df[col]), errors="coerce")
+    # Forward fill missing values
+    df = df.ffill()  # Use ffill() instead of fillna(method="ffill")
+    # Ensure coordinates are included
+    if 'Latitude' in df.columns and 'Longitude' in df.columns:
+        df['coordinates'] = df[['Latitude', 'Longitude']].rename(columns={'Latitude': 'lat', 'Longitude': 'lng'}).to_dict('records')
+    else:
+        df['coordinates'] = None
+    return df
+
+def load_and_preprocess_data():
+    """
+    Load the dataset from MongoDB and preprocess it by handling missing values.
+    The cleaned DataFrame is cached per process and only rebuilt when the
+    collection's data version changes.
+    """
+    try:
+        with span('mongo.version'):
+            version = get_data_version(COLLECTION_NAME)
+        df = _cached_frame(version)
+        if df is None:
+            with _data_cache_lock:
+                df = _cached_frame(version)
+                if df is None:
+                    df = _fetch_and_preprocess_data()
+                    _data_cache['entry'] = (version, df)
+        return df.copy()
+    except Exception as e:
+        logger.error(f"Error loading and preprocessing data: {e}")
+        raise
+
+async def load_and_preprocess_data_async():
+    """
+    Async counterpart of load_and_preprocess_data sharing the same per-process cache.
+    MongoDB is queried without blocking the event loop and the CPU-bound
+    preprocessing runs in a worker thread. The threading lock held by sync loads
+    is never taken here, so a sync fetch in a threadpool thread cannot stall the loop.
+    """
+    try:
+        with span('mongo.version'):
+            version = await get_data_version_async(COLLECTION_NAME)
+        df = _cached_frame(version)
+        if df is None:
+            async with _async_data_cache_lock():
+                df = _cached_frame(version)
+                if df is None:
+                    df = await _fetch_and_preprocess_data_async()
+                    _data_cache['entry'] = (version, df)
+        return df.copy()
     except Exception as e:
         logger.error(f"Error loading and preprocessing data: {e}")
         raise
 
+async def _fetch_and_preprocess_data_async():
+    """
+    Async counterpart of _fetch_and_preprocess_data.
+    """
+    collection = connect_to_mongodb_async()
+    if _load_mode['mode'] == 'aggregate':
+        try:
+            with span('mongo.fetch'):
+                cursor = await collection.aggregate(TYPED_LOAD_PIPELINE)
+                data = await cursor.to_list()
+            # Building the frame is still whole-collection work, so keep it off the event loop
+            return await asyncio.to_thread(_preprocess_data, data, typed=True)
+        except OperationFailure as e:
+            _typed_load_failed(e)
+    with span('mongo.fetch'):
+        data = await collection.find({}, DATA_PROJECTION).to_list()
+    return await asyncio.to_thread(_preprocess_data, data)
+
 def train_model(df, features, target):
     """
     Train a linear regression model for a given target variable.
     """
+    # scikit-learn is only needed for training; serving scores coefficient files with numpy
+    from sklearn.model_selection import train_test_split
+    from sklearn.linear_model import LinearRegression
+    from sklearn.metrics import mean_absolute_error, mean_squared_error
     X = df[features]
     y = df[target]
     X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
@@ -114,10 +359,11 @@ def train_model(df, features, target):
     print(f'\nModel Evaluation for {target}:\nMean Absolute Error (MAE): {mae}\nMean Squared Error (MSE): {mse}')
     return model
 
-def forecast_production(model, df, features, start_year, end_year):
+def project_features(df, features, start_year, end_year):
     """
-    Forecast future production using the trained model.
-    Returns a DataFrame with 'Year' and 'Predicted Production'.
+    Build the feature matrix for the forecast years by extending each feature's
+    average historical growth rate from the most recent year.
+    Returns a DataFrame with 'Year' and every column in `features`.
     """
     future_years = pd.DataFrame({'Year': range(start_year, end_year + 1)})
     
@@ -129,9 +375,14 @@ def forecast_production(model, df, features, start_year, end_year):
     last_population = df['Population (in millions)'].iloc[-1]
     last_non_renewable = df['Non-Renewable Energy (GWh)'].iloc[-1]
     
-    # Calculate projected values for each feature
-    projected_population = [last_population * (1 + avg_population_growth) ** (year - df['Year'].iloc[-1]) for year in future_years['Year']]
-    projected_non_renewable = [last_non_renewable * (1 + avg_non_renewable_growth) ** (year - df['Year'].iloc[-1]) for year in future_years['Year']]
+    # Years elapsed since the most recent record, for every forecast year at once
+    offsets = future_years['Year'].to_numpy() - df['Year'].iloc[-1]
+    
+    # Calculate projected values for each feature. float_power uses the same libm pow
+    # as scalar **, so results match the per-year computation bit for bit; the SIMD
+    # loop behind np.power can differ in the last digit.
+    projected_population = last_population * np.float_power(1 + avg_population_growth, offsets)
+    projected_non_renewable = last_non_renewable * np.float_power(1 + avg_non_renewable_growth, offsets)
     
     # Add projections to future_years DataFrame
     future_years['Population (in millions)'] = projected_population
@@ -143,13 +394,13 @@ def forecast_production(model, df, features, start_year, end_year):
         try:
             avg_gdp_growth = df['Gross Domestic Product'].pct_change().mean()
             last_gdp = df['Gross Domestic Product'].iloc[-1]
-            projected_gdp = [last_gdp * (1 + avg_gdp_growth) ** (year - df['Year'].iloc[-1]) for year in future_years['Year']]
+            projected_gdp = last_gdp * np.float_power(1 + avg_gdp_growth, offsets)
             future_years['Gross Domestic Product'] = projected_gdp
         except Exception as e:
             logger.warning(f"Could not project GDP: {e}. Using default values.")
             # Use a default growth rate of 3% if calculation fails
             last_gdp = df['Gross Domestic Product'].iloc[-1] if 'Gross Domestic Product' in df.columns and len(df['Gross Domestic Product']) > 0 else 1000.0
-            future_years['Gross Domestic Product'] = [last_gdp * (1.03) ** (year - df['Year'].iloc[-1]) for year in future_years['Year']]
+            future_years['Gross Domestic Product'] = last_gdp * np.float_power(1.03, offsets)
     
     # Make predictions using only the features the model was trained on
     prediction_features = [col for col in features if col in future_years.columns]
@@ -162,74 +413,226 @@ def forecast_production(model, df, features, start_year, end_year):
         for feature in missing_features:
             future_years[feature] = 1.0  # Use a default value
     
-    # Make the prediction
-    future_years['Predicted Production'] = model.predict(future_years[features])
+    return future_years
+
+def override_actuals(future_years, df, features, production_columns):
+    """
+    Replace forecasts with recorded values for the years present in `df`.
+    Those rows are flagged isPredicted=False, their features take the recorded
+    values, and every column in `production_columns` takes the recorded production.
+    """
+    # Recorded rows indexed by year; the first record wins when a year is duplicated
+    observed = df.drop_duplicates('Year', keep='first').set_index('Year', drop=False)
     
-    # Preserve the isPredicted flag for existing data
-    future_years['isPredicted'] = True  # Default all to predictions
+    # Forecast rows whose year was recorded, and the matching recorded rows
+    matched = future_years['Year'].isin(observed.index).to_numpy()
+    labels = future_years.index[matched]
+    actual = observed.loc[future_years['Year'].to_numpy()[matched]]
     
-    # Override with actual data for years that exist in original dataset
-    for year in future_years['Year']:
-        if year in df['Year'].values:
-            year_data = df[df['Year'] == year]
-            # Get index in future_years where Year matches
-            idx = future_years[future_years['Year'] == year].index[0]
-            
-            # Use actual data from original dataset for this year
-            future_years.loc[idx, 'isPredicted'] = False
-            
-            # Update features with actual values where available
-            for feature in features:
-                if feature in year_data.columns and not pd.isna(year_data[feature].values[0]):
-                    future_years.loc[idx, feature] = year_data[feature].values[0]
-            
-            # If target variable exists in original data, use that instead of prediction
-            target_col = None
-            for col in df.columns:
-                if '(GWh)' in col and 'Non-Renewable' not in col and 'Total' not in col:
-                    target_col = col
-                    break
-            
-            if target_col and target_col in year_data.columns:
-                future_years.loc[idx, 'Predicted Production'] = year_data[target_col].values[0]
+    # Years with actual data are not predictions
+    future_years['isPredicted'] = ~matched
     
+    # Update features with actual values where available
+    for feature in features:
+        if feature in actual.columns:
+            values = actual[feature].to_numpy()
+            available = ~pd.isna(values)
+            future_years.loc[labels[available], feature] = values[available]
+    
+    # If target variable exists in original data, use that instead of prediction
+    target_col = next(
+        (col for col in df.columns if '(GWh)' in col and 'Non-Renewable' not in col and 'Total' not in col),
+        None
+    )
+    if target_col and len(labels):
+        for column in production_columns:
+            future_years.loc[labels, column] = actual[target_col].to_numpy()
+
+def _output_columns(future_years, features, production_column='Predicted Production'):
     # Include all relevant columns in the output
-    output_columns = ['Year', 'Predicted Production', 'isPredicted']
+    output_columns = [production_column, 'isPredicted']
     
     # Include feature columns if they exist
     for feature in features:
         if feature in future_years.columns and feature != 'Year':
             output_columns.append(feature)
     
-    return future_years[output_columns]
+    return ['Year'] + output_columns
+
+def forecast_production(model, df, features, start_year, end_year):
+    """
+    Forecast future production using the trained model.
+    Returns a DataFrame with 'Year' and 'Predicted Production'.
+    """
+    future_years = project_features(df, features, start_year, end_year)
+    
+    # Make the prediction
+    future_years['Predicted Production'] = model.predict(future_years[features])
+    
+    override_actuals(future_years, df, features, ['Predicted Production'])
+    
+    return future_years[_output_columns(future_years, features)]
+
+def forecast_production_multi(models, df, features, start_year, end_year):
+    """
+    Forecast several targets at once from a single projected feature matrix.
+
+    The linear models are stacked into one coefficient matrix, so every target
+    is predicted with a single matrix multiply instead of one predict() each.
+
+    Parameters:
+        models (dict): Fitted LinearRegression models keyed by target name.
+
+    Returns:
+        dict: Target name -> DataFrame shaped like forecast_production's output.
+    """
+    future_years = project_features(df, features, start_year, end_year)
+    
+    targets = list(models)
+    coefficients = np.column_stack([models[target].coef_ for target in targets])
+    intercepts = np.array([models[target].intercept_ for target in targets])
+    predicted = future_years[features].to_numpy(dtype=float) @ coefficients + intercepts
+    
+    production_columns = [f'Predicted Production {i}' for i in range(len(targets))]
+    for i, column in enumerate(production_columns):
+        future_years[column] = predicted[:, i]
+    
+    override_actuals(future_years, df, features, production_columns)
+    
+    forecasts = {}
+    for target, column in zip(targets, production_columns):
+        forecast = future_years[_output_columns(future_years, features, column)]
+        forecasts[target] = forecast.rename(columns={column: 'Predicted Production'})
+    return forecasts
+
+# Targets served by the prediction endpoints, as used in /api/predictions/<target>/
+PREDICTION_TARGETS = ['geothermal', 'hydro', 'biomass', 'solar', 'wind']
+
+def current_model_version():
+    """
+    Return the published model version being served, or "legacy" for the bundled artifacts.
+    """
+    return current_version() or 'legacy'
+
+def load_target_model(target):
+    """
+    Return the trained model for a target such as "solar" from the model registry.
+    Models come from the current model version, so a newly published version is
+    picked up on the next lookup without restarting the server.
+    
+    The coefficient file is scored with numpy alone; the pickled LinearRegression
+    is only loaded when no coefficient file was exported for the model or the
+    coefficient file was not exported from the pickle next to it.
+    """
+    model_dir = current_model_dir()
+    if _served_model_dir['path'] != model_dir:
+        # A new version was published; drop the models of the previous one
+        if _served_model_dir['path'] is not None:
+            model_registry.clear()
+            coefficient_registry.clear()
+            logger.info(f"Switched to models in {model_dir}")
+        _served_model_dir['path'] = model_dir
+    model_path = os.path.join(model_dir, model_filename(target + " (GWh)"))
+    
+    # Log the model path
+    logger.debug(f"Loading model from {model_path}")
+    
+    with span('model.load'):
+        try:
+            coefficients = coefficient_registry.get(coefficient_path(model_path))
+        except FileNotFoundError:
+            return model_registry.get(model_path)
+        if _coefficients_match(coefficients, model_path):
+            return coefficients
+        return model_registry.get(model_path)
+
+def _coefficients_match(coefficients, model_path):
+    """
+    Check that a coefficient file was exported from the pickle at `model_path`.
+    A stale coefficient file, e.g. left next to a pickle replaced by hand, is
+    ignored so the replaced model is served. Deployments without pickles trust the file.
+    """
+    try:
+        digest = cached_file_digest(model_path)
+    except FileNotFoundError:
+        return True
+    if coefficients.source_sha256 == digest:
+        return True
+    if (model_path, digest) not in _stale_coefficients:
+        _stale_coefficients.add((model_path, digest))
+        logger.warning(f"Coefficients of {model_path} were not exported from it; serving the pickle")
+    return False
+
+def predict_target(target, df, start_year, end_year):
+    """
+    Load the trained model for the given target and forecast it from a preprocessed DataFrame.
+    """
+    model = load_target_model(target)
+    
+    features = ['Year', 'Population (in millions)', 'Non-Renewable Energy (GWh)']
+    
+    # Log the features
+    logger.debug(f"Using features: {features}")
+    
+    with span('forecast'):
+        predictions = forecast_production(model, df, features, start_year, end_year)
+    
+    # Log the predictions
+    logger.debug("Predictions: %s", predictions)
+    
+    return predictions
 
 def get_predictions(target, start_year, end_year):
     """
     Load the trained model and return predictions for the given target.
     """
     try:
-        target = target + "_(gwh)"
-        model_path = f'{target.replace(" ", "_").lower()}_model.pkl'
-        
-        # Log the model path
-        logger.debug(f"Loading model from {model_path}")
-        
-        model = joblib.load(model_path)
-        
         # Load data from MongoDB
         df = load_and_preprocess_data()
-        
-        features = ['Year', 'Population (in millions)', 'Non-Renewable Energy (GWh)']
-        
-        # Log the features
-        logger.debug(f"Using features: {features}")
-        
-        predictions = forecast_production(model, df, features, start_year, end_year)
-        
-        # Log the predictions
-        logger.debug(f"Predictions: {predictions}")
-        
-        return predictions
+        return predict_target(target, df, start_year, end_year)
+    except Exception as e:
+        logger.error(f"Error in get_predictions: {e}")
+        raise
+
+def predict_targets(targets, df, start_year, end_year):
+    """
+    Forecast several targets from one preprocessed DataFrame with stacked models.
+    """
+    models = {target: load_target_model(target) for target in targets}
+    features = ['Year', 'Population (in millions)', 'Non-Renewable Energy (GWh)']
+    with span('forecast'):
+        return forecast_production_multi(models, df, features, start_year, end_year)
+
+def get_predictions_multi(targets, start_year, end_year):
+    """
+    Return predictions for every target in `targets`, loading the data only once.
+    """
+    try:
+        df = load_and_preprocess_data()
+        return predict_targets(targets, df, start_year, end_year)
+    except Exception as e:
+        logger.error(f"Error in get_predictions_multi: {e}")
+        raise
+
+async def get_predictions_multi_async(targets, start_year, end_year):
+    """
+    Async counterpart of get_predictions_multi.
+    """
+    try:
+        df = await load_and_preprocess_data_async()
+        return await asyncio.to_thread(predict_targets, targets, df, start_year, end_year)
+    except Exception as e:
+        logger.error(f"Error in get_predictions_multi: {e}")
+        raise
+
+async def get_predictions_async(target, start_year, end_year):
+    """
+    Async counterpart of get_predictions. Model loading and forecasting are
+    CPU-bound, so they run in a worker thread instead of on the event loop.
+    """
+    try:
+        df = await load_and_preprocess_data_async()
+        return await asyncio.to_thread(predict_target, target, df, start_year, end_year)
     except Exception as e:
         logger.error(f"Error in get_predictions: {e}")
         raise
@@ -237,15 +640,11 @@ def get_predictions(target, start_year, end_year):
 def main():
     # Load data from MongoDB
     df = load_and_preprocess_data()
-    features = ['Year', 'Population (in millions)', 'Non-Renewable Energy (GWh)']
-    targets = ['Geothermal (GWh)', 'Hydro (GWh)', 'Biomass (GWh)', 'Solar (GWh)', 'Wind (GWh)']
-    models = {}
-    for target in targets:
-        model = train_model(df, features, target)
-        models[target] = model
-        joblib.dump(model, f'{target.replace(" ", "_").lower()}_model.pkl')
-    for target in targets:
-        model = models[target]
+    features = TRAINING_FEATURES
+    result = train_models(df, force=True)
+    print(f"Published model version {result['version']}")
+    for target in TRAINING_TARGETS:
+        model = model_registry.get(os.path.join(current_model_dir(), model_filename(target)))
         future_predictions = forecast_production(model, df, features, 2024, 2040)
         print(f"\nFuture Predictions for {target} (2024-2040):")
         print(future_predictions[['Year', 'Predicted Production']])
@@ -0,0 +1,107 @@
+import os
+import hashlib
+import threading
+import logging
+import joblib
+
+# Configure the logger
+logger = logging.getLogger(__name__)
+
+def file_digest(path, chunk_size=1 << 16):
+    """
+    Return the SHA-256 hex digest of a file's contents.
+    """
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+# Digests of files that are checked but not loaded, refreshed when mtime or size change
+_digests = {}
+
+def cached_file_digest(path):
+    """
+    Return file_digest(path), only rehashing the file when its mtime or size changed.
+    """
+    stat = os.stat(path)
+    entry = _digests.get(path)
+    if entry is None or entry[:2] != (stat.st_mtime_ns, stat.st_size):
+        entry = _digests[path] = (stat.st_mtime_ns, stat.st_size, file_digest(path))
+    return entry[2]
+
+class ModelRegistry:
+    """
+    Process-wide cache of model artifacts loaded from disk.
+
+    Each artifact is loaded once and served from memory. On every lookup the
+    file's mtime and size are checked; when they change the file is hashed and
+    only reloaded if its contents actually differ from the cached copy.
+    """
+
+    def __init__(self, loader=joblib.load):
+        self._loader = loader
+        self._entries = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.reloads = 0
+
+    def get(self, path):
+        """
+        Return the model stored at `path`, loading or reloading it if needed.
+        """
+        path = os.path.abspath(path)
+        stat = os.stat(path)
+        entry = self._entries.get(path)
+        if entry and entry['mtime_ns'] == stat.st_mtime_ns and entry['size'] == stat.st_size:
+            self.hits += 1
+            return entry['model']
+
+        with self._lock:
+            # Another thread may have refreshed the entry while we waited
+            entry = self._entries.get(path)
+            if entry and entry['mtime_ns'] == stat.st_mtime_ns and entry['size'] == stat.st_size:
+                self.hits += 1
+                return entry['model']
+
+            digest = file_digest(path)
+            if entry and entry['sha256'] == digest:
+                # File was touched but its contents are unchanged
+                entry['mtime_ns'] = stat.st_mtime_ns
+                entry['size'] = stat.st_size
+                self.hits += 1
+                return entry['model']
+
+            logger.debug(f"Loading model from {path}")
+            model = self._loader(path)
+            if entry:
+                self.reloads += 1
+                logger.info(f"Reloaded changed model artifact {path}")
+            else:
+                self.misses += 1
+            self._entries[path] = {
+                'model': model,
+                'mtime_ns': stat.st_mtime_ns,
+                'size': stat.st_size,
+                'sha256': digest
+            }
+            return model
+
+    def clear(self):
+        """
+        Drop every cached model so the next lookup reloads from disk.
+        """
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        """
+        Return the hit/miss/reload counters and the number of cached models.
+        """
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'reloads': self.reloads,
+            'cached': len(self._entries)
+        }
@@ -0,0 +1,109 @@
+import os
+import json
+import shutil
+import tempfile
+import threading
+import logging
+
+# Configure the logger
+logger = logging.getLogger(__name__)
+
+# Versioned model directories live here; CURRENT names the version being served
+script_dir = os.path.dirname(os.path.abspath(__file__))
+MODEL_STORE_DIR = os.getenv("ECOPULSE_MODEL_DIR", os.path.join(script_dir, 'trained_models'))
+CURRENT_FILE = 'CURRENT'
+MANIFEST_FILE = 'manifest.json'
+
+# Artifacts committed next to the code, served until the first versioned training run
+LEGACY_MODEL_DIR = script_dir
+
+# CURRENT is re-read only when its mtime or size changes
+_current = {'stat': None, 'version': None}
+_current_lock = threading.Lock()
+
+def current_version(root=MODEL_STORE_DIR):
+    """
+    Return the version named by the store's CURRENT file, or None when nothing was published.
+    """
+    path = os.path.join(root, CURRENT_FILE)
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    signature = (path, stat.st_mtime_ns, stat.st_size)
+    if _current['stat'] == signature:
+        return _current['version']
+    with _current_lock:
+        with open(path) as f:
+            version = f.read().strip() or None
+        _current['stat'] = signature
+        _current['version'] = version
+    return version
+
+def current_model_dir(root=MODEL_STORE_DIR):
+    """
+    Return the directory of the served models, falling back to the legacy artifacts.
+    """
+    version = current_version(root)
+    if version is None:
+        return LEGACY_MODEL_DIR
+    return os.path.join(root, version)
+
+def read_manifest(version_dir):
+    """
+    Return the manifest of a version directory, or an empty one if it has none.
+    """
+    try:
+        with open(os.path.join(version_dir, MANIFEST_FILE)) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {'models': {}}
+
+def publish_version(version, write_files, manifest, root=MODEL_STORE_DIR):
+    """
+    Write a new model version and atomically make it the current one.
+
+    The version is built in a temporary directory and renamed into place, then
+    CURRENT is replaced in one rename, so a running server only ever sees a
+    complete version. Servers pick it up on their next model lookup.
+
+    Parameters:
+        version (str): Name of the new version directory.
+        write_files (callable): Called with the temporary directory to write the artifacts into.
+        manifest (dict): Metadata stored as manifest.json next to the artifacts.
+
+    Returns:
+        str: The published version directory.
+    """
+    os.makedirs(root, exist_ok=True)
+    target = os.path.join(root, version)
+    tmp_dir = tempfile.mkdtemp(dir=root, suffix='.tmp')
+    try:
+        write_files(tmp_dir)
+        with open(os.path.join(tmp_dir, MANIFEST_FILE), 'w') as f:
+            json.dump(manifest, f, indent=2)
+        os.replace(tmp_dir, target)
+    except Exception:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        raise
+
+    fd, tmp_current = tempfile.mkstemp(dir=root, suffix='.tmp')
+    with os.fdopen(fd, 'w') as f:
+        f.write(version)
+    os.replace(tmp_current, os.path.join(root, CURRENT_FILE))
+    logger.info(f"Published model version {version}")
+    return target
+
+def prune_versions(keep, root=MODEL_STORE_DIR):
+    """
+    Remove all but the `keep` newest versions, never touching the current one.
+    Older versions are kept for a while so servers mid-request can finish reading them.
+    """
+    current = current_version(root)
+    versions = sorted(
+        name for name in os.listdir(root)
+        if os.path.isdir(os.path.join(root, name)) and not name.endswith('.tmp')
+    )
+    for name in versions[:-keep] if keep else versions:
+        if name != current:
+            shutil.rmtree(os.path.join(root, name), ignore_errors=True)
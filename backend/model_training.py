@@ -0,0 +1,120 @@
+import os
+import shutil
+import hashlib
+import logging
+from datetime import datetime, timezone
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import joblib
+from model_store import MODEL_STORE_DIR, current_version, read_manifest, publish_version, prune_versions
+from model_registry import file_digest
+from coefficient_model import LinearCoefficients, coefficient_path, save_coefficients
+
+# Configure the logger
+logger = logging.getLogger(__name__)
+
+# Models trained by the pipeline and the features they share
+TRAINING_TARGETS = ['Geothermal (GWh)', 'Hydro (GWh)', 'Biomass (GWh)', 'Solar (GWh)', 'Wind (GWh)']
+TRAINING_FEATURES = ['Year', 'Population (in millions)', 'Non-Renewable Energy (GWh)']
+
+# Older model versions kept next to the current one
+MODEL_VERSIONS_KEPT = int(os.getenv("MODEL_VERSIONS_KEPT", "3"))
+
+def model_filename(target):
+    """
+    Return the artifact file name of a target column, e.g. "solar_(gwh)_model.pkl".
+    """
+    return f'{target.replace(" ", "_").lower()}_model.pkl'
+
+def training_data_hash(df, features, target):
+    """
+    Return a SHA-256 digest of exactly the rows and columns a target is trained on.
+    A target whose digest is unchanged does not need to be retrained.
+    """
+    digest = hashlib.sha256()
+    digest.update('\0'.join(features + [target]).encode())
+    digest.update(np.ascontiguousarray(df[features + [target]].to_numpy(dtype=float)).tobytes())
+    return digest.hexdigest()
+
+def _fit_target(frame, features, target):
+    """
+    Fit one target. Runs in a worker process, so it only receives the columns it needs.
+    """
+    from linearregression_predictiveanalysis import train_model
+    return target, train_model(frame, features, target)
+
+def train_models(df=None, targets=None, workers=None, force=False, root=MODEL_STORE_DIR, keep=MODEL_VERSIONS_KEPT):
+    """
+    Train the renewable models incrementally and publish them as a new model version.
+
+    Targets whose training data hash matches the current version are carried
+    over without refitting; the others are fitted in parallel worker processes.
+    Nothing is published when every target is unchanged.
+
+    Parameters:
+        df (DataFrame): Preprocessed training data; loaded from MongoDB when omitted.
+        targets (list): Targets that may be retrained, defaulting to all of them. Every
+            published version still contains all targets; targets missing from the
+            current version are always trained.
+        workers (int): Worker processes for fitting; defaults to one per changed target up to the CPU count.
+        force (bool): Retrain every target even if its data is unchanged.
+
+    Returns:
+        dict: {'version': published or current version, 'trained': [...], 'reused': [...]}
+    """
+    if df is None:
+        from linearregression_predictiveanalysis import load_and_preprocess_data
+        df = load_and_preprocess_data()
+
+    features = TRAINING_FEATURES
+    selected = TRAINING_TARGETS if targets is None else targets
+    version = current_version(root)
+    previous = read_manifest(os.path.join(root, version)) if version else {'models': {}}
+    hashes = {target: training_data_hash(df, features, target) for target in TRAINING_TARGETS}
+
+    def needs_training(target):
+        if target not in previous['models']:
+            return True
+        return target in selected and (force or previous['models'][target]['data_hash'] != hashes[target])
+
+    pending = [target for target in TRAINING_TARGETS if needs_training(target)]
+    reused = [target for target in TRAINING_TARGETS if target not in pending]
+    if not pending:
+        logger.info(f"All models are up to date in version {version}")
+        return {'version': version, 'trained': [], 'reused': reused}
+
+    workers = workers or min(len(pending), os.cpu_count() or 1)
+    jobs = [(df[features + [target]].copy(), features, target) for target in pending]
+    if workers == 1 or len(jobs) == 1:
+        fitted = dict(_fit_target(*job) for job in jobs)
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            fitted = dict(executor.map(_fit_target, *zip(*jobs)))
+
+    new_version = datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%S%fZ')
+    trained_at = datetime.now(timezone.utc).isoformat()
+    manifest = {'features': features, 'models': {}}
+    for target in TRAINING_TARGETS:
+        if target in fitted:
+            manifest['models'][target] = {'file': model_filename(target), 'data_hash': hashes[target], 'trained_at': trained_at}
+        else:
+            manifest['models'][target] = previous['models'][target]
+
+    def write_files(directory):
+        for target in TRAINING_TARGETS:
+            path = os.path.join(directory, model_filename(target))
+            if target in fitted:
+                joblib.dump(fitted[target], path)
+                coefficients = LinearCoefficients.from_model(fitted[target], features, file_digest(path))
+                save_coefficients(coefficients, coefficient_path(path))
+            else:
+                # Unchanged artifacts are carried over from the current version
+                for name in (model_filename(target), coefficient_path(model_filename(target))):
+                    source = os.path.join(root, version, name)
+                    if os.path.exists(source):
+                        shutil.copy2(source, os.path.join(directory, name))
+
+    publish_version(new_version, write_files, manifest, root)
+    prune_versions(keep, root)
+    logger.info(f"Trained {len(fitted)} and reused {len(reused)} models in version {new_version}")
+    return {'version': new_version, 'trained': pending, 'reused': reused}
@@ -0,0 +1,182 @@
+import os
+import asyncio
+import threading
+import weakref
+import logging
+from pymongo import MongoClient, AsyncMongoClient
+from pymongo.errors import BulkWriteError
+from dotenv import load_dotenv
+
+# Load environment variables from .env file
+load_dotenv()
+
+# Configure the logger
+logger = logging.getLogger(__name__)
+
+# MongoDB connection
+MONGO_URL = os.getenv("MONGO_URL")  # Load MongoDB URI from environment variables
+DATABASE_NAME = "ecopulse"
+
+# Connection pool settings, tunable per deployment
+MONGO_MAX_POOL_SIZE = int(os.getenv("MONGO_MAX_POOL_SIZE", "50"))
+MONGO_MIN_POOL_SIZE = int(os.getenv("MONGO_MIN_POOL_SIZE", "0"))
+MONGO_MAX_IDLE_TIME_MS = int(os.getenv("MONGO_MAX_IDLE_TIME_MS", "300000"))
+MONGO_SERVER_SELECTION_TIMEOUT_MS = int(os.getenv("MONGO_SERVER_SELECTION_TIMEOUT_MS", "5000"))
+
+# Documents sent per insert_many round trip during bulk ingest
+MONGO_BULK_CHUNK_SIZE = int(os.getenv("MONGO_BULK_CHUNK_SIZE", "1000"))
+
+# One client per worker process, created on first use
+_client = None
+_client_lock = threading.Lock()
+
+# Async clients are bound to the event loop they were created on, so keep one per loop
+_async_clients = weakref.WeakKeyDictionary()
+
+def _reset_after_fork():
+    """
+    Drop the client inherited from the parent process.
+    MongoClient is not fork-safe, so each child builds its own on first use.
+    """
+    global _client, _client_lock, _async_clients
+    _client = None
+    _client_lock = threading.Lock()
+    _async_clients = weakref.WeakKeyDictionary()
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+def get_mongo_client():
+    """
+    Return the process-wide MongoClient, creating it lazily.
+    The client keeps its own connection pool, so callers should never close it.
+    """
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = MongoClient(
+                    MONGO_URL,
+                    serverSelectionTimeoutMS=MONGO_SERVER_SELECTION_TIMEOUT_MS,
+                    maxPoolSize=MONGO_MAX_POOL_SIZE,
+                    minPoolSize=MONGO_MIN_POOL_SIZE,
+                    maxIdleTimeMS=MONGO_MAX_IDLE_TIME_MS,
+                    connect=False
+                )
+                logger.debug(f"Created MongoDB client for process {os.getpid()} (maxPoolSize={MONGO_MAX_POOL_SIZE}).")
+    return _client
+
+def get_collection(collection_name):
+    """
+    Return a collection of the ecopulse database from the shared client.
+    """
+    return get_mongo_client()[DATABASE_NAME][collection_name]
+
+def get_async_mongo_client():
+    """
+    Return the AsyncMongoClient for the running event loop, creating it lazily.
+    An ASGI worker runs a single loop, so this is one pooled client per worker.
+    Must be called from a coroutine.
+    """
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is None:
+        client = AsyncMongoClient(
+            MONGO_URL,
+            serverSelectionTimeoutMS=MONGO_SERVER_SELECTION_TIMEOUT_MS,
+            maxPoolSize=MONGO_MAX_POOL_SIZE,
+            minPoolSize=MONGO_MIN_POOL_SIZE,
+            maxIdleTimeMS=MONGO_MAX_IDLE_TIME_MS,
+            connect=False
+        )
+        _async_clients[loop] = client
+        logger.debug(f"Created async MongoDB client for process {os.getpid()} (maxPoolSize={MONGO_MAX_POOL_SIZE}).")
+    return client
+
+def get_async_collection(collection_name):
+    """
+    Return a collection of the ecopulse database from the async client of the running loop.
+    """
+    return get_async_mongo_client()[DATABASE_NAME][collection_name]
+
+# Per-collection data versions, shared by every worker through MongoDB
+DATA_VERSION_COLLECTION = "dataVersions"
+
+def get_data_version(collection_name):
+    """
+    Return the current data version of a collection (0 if it was never bumped).
+    """
+    doc = get_collection(DATA_VERSION_COLLECTION).find_one({'_id': collection_name}, {'version': 1})
+    return doc['version'] if doc else 0
+
+def bump_data_version(collection_name):
+    """
+    Increment the data version of a collection after a write so cached reads rebuild.
+    """
+    get_collection(DATA_VERSION_COLLECTION).update_one(
+        {'_id': collection_name},
+        {'$inc': {'version': 1}},
+        upsert=True
+    )
+
+async def get_data_version_async(collection_name):
+    """
+    Async counterpart of get_data_version.
+    """
+    doc = await get_async_collection(DATA_VERSION_COLLECTION).find_one({'_id': collection_name}, {'version': 1})
+    return doc['version'] if doc else 0
+
+async def bump_data_version_async(collection_name):
+    """
+    Async counterpart of bump_data_version.
+    """
+    await get_async_collection(DATA_VERSION_COLLECTION).update_one(
+        {'_id': collection_name},
+        {'$inc': {'version': 1}},
+        upsert=True
+    )
+
+def insert_many_chunked(collection, documents, chunk_size=None, summary=None):
+    """
+    Insert documents with unordered insert_many calls of at most chunk_size documents.
+
+    A failing document does not stop the rest of the batch. Errors are reported
+    with the index of the document in the original list.
+
+    Parameters:
+        summary (dict): Optional summary updated after every chunk, so the caller
+            still knows how many documents were written when a later chunk raises
+            (e.g. on a network error).
+
+    Returns:
+        dict: {'inserted': number of documents written, 'errors': [{'index', 'message'}]}
+    """
+    chunk_size = chunk_size or MONGO_BULK_CHUNK_SIZE
+    summary = summary if summary is not None else {'inserted': 0, 'errors': []}
+    for offset in range(0, len(documents), chunk_size):
+        chunk = documents[offset:offset + chunk_size]
+        try:
+            result = collection.insert_many(chunk, ordered=False)
+            summary['inserted'] += len(result.inserted_ids)
+        except BulkWriteError as e:
+            summary['inserted'] += e.details.get('nInserted', 0)
+            for error in e.details.get('writeErrors', []):
+                summary['errors'].append({'index': offset + error['index'], 'message': error.get('errmsg', str(error))})
+    return summary
+
+async def insert_many_chunked_async(collection, documents, chunk_size=None, summary=None):
+    """
+    Async counterpart of insert_many_chunked for an AsyncMongoClient collection.
+    """
+    chunk_size = chunk_size or MONGO_BULK_CHUNK_SIZE
+    summary = summary if summary is not None else {'inserted': 0, 'errors': []}
+    for offset in range(0, len(documents), chunk_size):
+        chunk = documents[offset:offset + chunk_size]
+        try:
+            result = await collection.insert_many(chunk, ordered=False)
+            summary['inserted'] += len(result.inserted_ids)
+        except BulkWriteError as e:
+            summary['inserted'] += e.details.get('nInserted', 0)
+            for error in e.details.get('writeErrors', []):
+                summary['errors'].append({'index': offset + error['index'], 'message': error.get('errmsg', str(error))})
+    return summary
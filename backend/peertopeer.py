@@ -1,46 +1,68 @@
 import pandas as pd
 import numpy as np
-from sklearn.linear_model import LinearRegression
 import os
 import logging
-from pymongo import MongoClient
-from pymongo.errors import ConnectionFailure
-import time
+import threading
+from mongodb import get_collection, get_async_collection, insert_many_chunked
+from mongodb import get_data_version, bump_data_version, get_data_version_async, bump_data_version_async
+from sidecar_cache import load_or_build
+from excel_cache import read_excel_cached
+from tracing import span
 
 # Configure the logger
 logging.basicConfig(level=logging.DEBUG)
 logger = logging.getLogger(__name__)
 
-# Load dataset
+# Dataset location; it is parsed lazily on first use
 script_dir = os.path.dirname(os.path.abspath(__file__))
 file_path = os.path.join(script_dir, 'peertopeer.xlsx')
-df = pd.read_excel(file_path)
 
 # MongoDB connection
-MONGO_URL = os.getenv("MONGO_URL")  # Load MongoDB URI from environment variables
-DATABASE_NAME = "ecopulse"  # Replace with your database name
 COLLECTION_NAME = "peertopeer"  # Replace with your collection name
 
-def connect_to_mongodb_peertopeer(retries=3, delay=5):
-    """
-    Connect to MongoDB Atlas and return the collection.
-    Retries the connection in case of failure.
-    """
-    for attempt in range(retries):
-        try:
-            client = MongoClient(MONGO_URL, serverSelectionTimeoutMS=5000)
-            db = client[DATABASE_NAME]
-            collection = db[COLLECTION_NAME]
-            # Attempt to ping the server to check the connection
-            client.admin.command('ping')
-            logger.debug("Connected to MongoDB Atlas successfully.")
-            return collection
-        except ConnectionFailure as e:
-            logger.error(f"Error connecting to MongoDB (attempt {attempt + 1}): {e}")
-            if attempt < retries - 1:
-                time.sleep(delay)
-            else:
-                raise
+def connect_to_mongodb_peertopeer():
+    """
+    Return the peertopeer collection from the shared, pooled MongoDB client.
+    """
+    return get_collection(COLLECTION_NAME)
+
+def connect_to_mongodb_peertopeer_async():
+    """
+    Return the peertopeer collection from the async client of the running event loop.
+    """
+    return get_async_collection(COLLECTION_NAME)
+
+def peertopeer_data_version():
+    """
+    Return the peertopeer data version, which changes after every write made through the API.
+    """
+    return get_data_version(COLLECTION_NAME)
+
+async def peertopeer_data_version_async():
+    """
+    Async counterpart of peertopeer_data_version.
+    """
+    return await get_data_version_async(COLLECTION_NAME)
+
+def notify_peertopeer_changed():
+    """
+    Bump the peertopeer data version after a write so cached copies revalidate.
+    """
+    bump_data_version(COLLECTION_NAME)
+
+async def notify_peertopeer_changed_async():
+    """
+    Async counterpart of notify_peertopeer_changed.
+    """
+    await bump_data_version_async(COLLECTION_NAME)
+
+def forecast_source_signature():
+    """
+    Return a short signature of the workbook the forecasts are built from.
+    The forecast state only changes when this file does.
+    """
+    stat = os.stat(file_path)
+    return f'{stat.st_mtime_ns}-{stat.st_size}'
 
 def createPeertoPeer(data):
     """
@@ -50,16 +72,30 @@ def createPeertoPeer(data):
         collection = connect_to_mongodb_peertopeer()
         # Add the isPredicted flag for actual data
         collection.insert_one(data)
+        notify_peertopeer_changed()
         logger.info("Actual data inserted successfully.")
     except Exception as e:
         logger.error(f"Error inserting actual data: {e}")
         raise
 
-# Display DataFrame columns and first few rows
-# print("DataFrame Columns:")
-# print(df.columns)
-# print("\nFirst few rows of the DataFrame:")
-# print(df.head())
+def createPeertoPeerMany(documents, chunk_size=None, summary=None):
+    """
+    Insert many actual data documents into MongoDB with unordered bulk writes.
+    Returns the insert_many_chunked summary of inserted documents and per-item errors.
+    The data version is bumped whenever anything was written, even if a later chunk raised.
+    """
+    summary = summary if summary is not None else {'inserted': 0, 'errors': []}
+    try:
+        collection = connect_to_mongodb_peertopeer()
+        insert_many_chunked(collection, documents, chunk_size, summary)
+        logger.info(f"Bulk inserted {summary['inserted']} of {len(documents)} actual data documents.")
+        return summary
+    except Exception as e:
+        logger.error(f"Error bulk inserting actual data after {summary['inserted']} documents: {e}")
+        raise
+    finally:
+        if summary['inserted']:
+            notify_peertopeer_changed()
 
 # Define subgrid names and metrics
 subgrids = ['Bohol', 'Cebu', 'Negros', 'Panay', 'Leyte-Samar']
@@ -75,101 +111,226 @@ metrics = [
     'Visayas Total Power Consumption (GWh)'  # Ensure this metric is included
 ]
 
-# Create a dictionary to hold DataFrames for each subgrid
-subgrid_data = {}
+# Vectorized least-squares engine: fits every column's trend line in one pass
+def fit_linear_trends(years, values):
+    """
+    Fit y = slope * year + intercept independently for every column of `values`.
+
+    Parameters:
+        years (np.ndarray): 1-D array of years, one per row.
+        values (np.ndarray): 2-D array (rows x columns). NaNs are ignored per column.
+
+    Returns:
+        tuple: (slopes, intercepts, counts) arrays with one entry per column.
+    """
+    x = np.asarray(years, dtype=float)[:, None]
+    y = np.asarray(values, dtype=float)
+    mask = ~np.isnan(y)
+    counts = mask.sum(axis=0)
+    safe_counts = np.where(counts > 0, counts, 1)
+
+    # Per-column means over the non-missing rows only
+    x_mean = (x * mask).sum(axis=0) / safe_counts
+    y_mean = np.where(mask, y, 0.0).sum(axis=0) / safe_counts
 
-# Extract data for each subgrid and metric
-for subgrid in subgrids:
-    # Filter columns that belong to the current subgrid and metrics
-    subgrid_columns = ['Year'] + [f'{subgrid} {metric}' for metric in metrics if f'{subgrid} {metric}' in df.columns]
+    # Closed-form OLS on centered data, as LinearRegression does
+    dx = np.where(mask, x - x_mean, 0.0)
+    dy = np.where(mask, y - y_mean, 0.0)
+    sxx = (dx * dx).sum(axis=0)
+    sxy = (dx * dy).sum(axis=0)
+    slopes = np.divide(sxy, sxx, out=np.zeros_like(sxy), where=sxx > 0)
+    intercepts = y_mean - slopes * x_mean
+    return slopes, intercepts, counts
 
-    if len(subgrid_columns) > 1:  # Ensure there are relevant columns
-        # Create a DataFrame for the subgrid with 'Year' and its specific columns
-        subgrid_df = df[subgrid_columns].copy()
+def build_forecast_table(df, columns):
+    """
+    Fit every column once and store what is needed to answer any year.
+
+    Returns:
+        dict: Per-column slopes, intercepts, row counts and earliest years, plus
+        the actual values indexed by year for exact-year passthrough.
+    """
+    years = df['Year'].values.astype(float)
+    values = df[columns].values.astype(float)
+    slopes, intercepts, counts = fit_linear_trends(years, values)
+    mask = ~np.isnan(values)
 
-        # Rename columns to remove the subgrid prefix for clarity
-        subgrid_df.columns = ['Year'] + [col.replace(f'{subgrid} ', '') for col in subgrid_columns[1:]]
+    # First non-missing actual value per (year, column)
+    known_years = np.unique(years)
+    actual_values = np.full((len(known_years), len(columns)), np.nan)
+    for row in range(len(years) - 1, -1, -1):
+        i = np.searchsorted(known_years, years[row])
+        actual_values[i] = np.where(mask[row], values[row], actual_values[i])
+
+    return {
+        'columns': list(columns),
+        'slopes': slopes,
+        'intercepts': intercepts,
+        'counts': counts,
+        'min_years': np.where(mask, years[:, None], np.inf).min(axis=0),
+        'known_years': known_years,
+        'actual_values': actual_values
+    }
+
+def forecast_from_table(table, target_years):
+    """
+    Predict every column of a forecast table for each of the target years.
+
+    Years present in the data return the actual value, years before the
+    earliest data point return 0.0, and every other year is read off the
+    column's linear trend.
+
+    Returns:
+        np.ndarray: Array of shape (len(target_years), len(columns)).
+    """
+    target_years = np.asarray(target_years, dtype=float)
+    predictions = target_years[:, None] * table['slopes'] + table['intercepts']
 
-        # Store the DataFrame in the dictionary
-        subgrid_data[subgrid] = subgrid_df
+    # Use the actual value where the target year exists in the data
+    known_years = table['known_years']
+    if len(known_years):
+        idx = np.minimum(np.searchsorted(known_years, target_years), len(known_years) - 1)
+        actual = table['actual_values'][idx]
+        has_actual = (known_years[idx] == target_years)[:, None] & ~np.isnan(actual)
+        predictions = np.where(has_actual, actual, predictions)
     else:
-        print(f"No data found for subgrid: {subgrid}")
+        has_actual = np.zeros(predictions.shape, dtype=bool)
+
+    # No prediction before the earliest data point or for empty columns
+    before_earliest = ~has_actual & (target_years[:, None] < table['min_years'])
+    predictions = np.where(before_earliest | (table['counts'] == 0), 0.0, predictions)
+
+    if (table['counts'] == 0).any():
+        empty = [col for col, n in zip(table['columns'], table['counts']) if n == 0]
+        logger.warning(f"No data available for {empty} after dropping NaN values")
+    if before_earliest.any():
+        logger.warning(f"{int(before_earliest.sum())} predictions fall before the earliest data point")
+    return predictions
+
+def predict_columns(df, columns, target_year=2040):
+    """
+    Predict the value of several columns for a single year.
+
+    Returns:
+        np.ndarray: One predicted value per column.
+    """
+    return forecast_from_table(build_forecast_table(df, columns), [target_year])[0]
 
 # Function to perform linear regression and predict future values
 def predict_future(df, column, target_year=2040):
-    # Drop rows with missing values in the specified column
-    df_clean = df.dropna(subset=[column])
-    
-    # Check if we have any data after dropping NaN values
-    if df_clean.empty:
-        logger.warning(f"No data available for {column} after dropping NaN values")
-        return np.array([target_year]), np.array([0.0])  # Return default values
-    
-    # Check if the target year is in our dataset
-    if target_year in df_clean['Year'].values:
-        # Return the actual value for that year
-        target_value = df_clean[df_clean['Year'] == target_year][column].values[0]
-        logger.debug(f"Found actual value for {column} in year {target_year}: {target_value}")
-        return np.array([target_year]), np.array([target_value])
-    
-    # Get the maximum and minimum year in the data
-    max_year = df_clean['Year'].max()
-    min_year = df_clean['Year'].min()
-    
-    logger.debug(f"Predicting {column} for year {target_year}. Data range: {min_year}-{max_year}")
-    
-    # For future predictions
-    if target_year > max_year:
-        try:
-            # Prepare the data for regression
-            X = df_clean['Year'].values.reshape(-1, 1)  # X is the years
-            y = df_clean[column].values  # y is the values
-            
-            # Fit the model
-            model = LinearRegression()
-            model.fit(X, y)
-            
-            # Create single prediction point for the target year
-            pred_point = np.array([[target_year]])
-            prediction = model.predict(pred_point)
-            logger.debug(f"Predicted future value for {column} in year {target_year}: {prediction[0]}")
-            return np.array([target_year]), prediction
-        except Exception as e:
-            logger.error(f"Error predicting future value for {column} in year {target_year}: {e}")
-            return np.array([target_year]), np.array([0.0])
-    
-    # For interpolation (if target_year is between min and max)
-    if min_year < target_year < max_year:
-        try:
-            X = df_clean['Year'].values.reshape(-1, 1)
-            y = df_clean[column].values
-            
-            model = LinearRegression()
-            model.fit(X, y)
-            
-            pred_point = np.array([[target_year]])
-            prediction = model.predict(pred_point)
-            logger.debug(f"Interpolated value for {column} in year {target_year}: {prediction[0]}")
-            return np.array([target_year]), prediction
-        except Exception as e:
-            logger.error(f"Error interpolating value for {column} in year {target_year}: {e}")
-            return np.array([target_year]), np.array([0.0])
-    
-    # If target_year is before our earliest data
-    logger.warning(f"Target year {target_year} is before earliest data point {min_year}")
-    return np.array([target_year]), np.array([0.0])
+    prediction = predict_columns(df, [column], target_year=target_year)
+    logger.debug(f"Predicted value for {column} in year {target_year}: {prediction[0]}")
+    return np.array([target_year]), prediction
 
-# Function to get predictions based on energy type and year range
-def get_peer_to_predictions(start_year=None, end_year=None):
+visayas_gen_column = 'Visayas Total Power Generation (GWh)'
+visayas_consumption_column = 'Visayas Total Power Consumption (GWh)'
+
+def _build_forecast_state(source_path):
     """
-    Predict energy metrics for a given year range.
+    Parse the peer-to-peer workbook, fit every trend line and resolve the row
+    layout of a single prediction year.
+    """
+    df = read_excel_cached(source_path)
+
+    # Create a dictionary to hold DataFrames for each subgrid
+    subgrid_data = {}
+
+    # Extract data for each subgrid and metric
+    for subgrid in subgrids:
+        # Filter columns that belong to the current subgrid and metrics
+        subgrid_columns = ['Year'] + [f'{subgrid} {metric}' for metric in metrics if f'{subgrid} {metric}' in df.columns]
+
+        if len(subgrid_columns) > 1:  # Ensure there are relevant columns
+            # Create a DataFrame for the subgrid with 'Year' and its specific columns
+            subgrid_df = df[subgrid_columns].copy()
+
+            # Rename columns to remove the subgrid prefix for clarity
+            subgrid_df.columns = ['Year'] + [col.replace(f'{subgrid} ', '') for col in subgrid_columns[1:]]
+
+            # Store the DataFrame in the dictionary
+            subgrid_data[subgrid] = subgrid_df
+        else:
+            logger.warning(f"No data found for subgrid: {subgrid}")
+
+    # Check if 'Visayas Total Power Generation (GWh)' exists in the DataFrame
+    has_visayas_gen = visayas_gen_column in df.columns and df[visayas_gen_column].count() > 0
+    if visayas_gen_column not in df.columns:
+        logger.warning(f"Column '{visayas_gen_column}' not found in DataFrame")
+    if visayas_consumption_column not in df.columns:
+        logger.warning(f"Column '{visayas_consumption_column}' not found in DataFrame")
+
+    # Every source column a prediction can need
+    forecast_columns = []
+    if has_visayas_gen:
+        forecast_columns.append(visayas_gen_column)
+    if visayas_consumption_column in df.columns:
+        forecast_columns.append(visayas_consumption_column)
+    for place, df_place in subgrid_data.items():
+        forecast_columns.extend(f'{place} {metric}' for metric in df_place.columns[1:])
+    forecast_columns = list(dict.fromkeys(forecast_columns))
+
+    # Fit all trend lines once; requests only evaluate the table
+    forecast_table = build_forecast_table(df, forecast_columns)
+
+    # Row layout of a single prediction year, resolved against the forecast table
+    forecast_index = {column: i for i, column in enumerate(forecast_table['columns'])}
+    layout_places = []
+    layout_energy_types = []
+    layout_sources = []
+    layout_is_consumption = []
+    for place, df_place in subgrid_data.items():
+        if 'Total Power Generation (GWh)' in df_place.columns:
+            generation_index = forecast_index[f'{place} Total Power Generation (GWh)']
+            layout_places += [place, place]
+            layout_energy_types += ['Total Power Generation (GWh)', f'{place} Estimated Consumption (GWh)']
+            layout_sources += [generation_index, generation_index]
+            layout_is_consumption += [False, True]
+        else:
+            logger.warning(f"Column 'Total Power Generation (GWh)' not found for {place}")
+        for metric in metrics:
+            if metric in df_place.columns:
+                layout_places.append(place)
+                layout_energy_types.append(metric)
+                layout_sources.append(forecast_index[f'{place} {metric}'])
+                layout_is_consumption.append(False)
+
+    return {
+        'df': df,
+        'subgrid_data': subgrid_data,
+        'forecast_table': forecast_table,
+        'forecast_index': forecast_index,
+        'layout_places': np.array(layout_places, dtype=object),
+        'layout_energy_types': np.array(layout_energy_types, dtype=object),
+        'layout_sources': np.array(layout_sources, dtype=np.intp),
+        'layout_is_consumption': np.array(layout_is_consumption, dtype=bool)
+    }
+
+_forecast_state = None
+_forecast_state_lock = threading.Lock()
+
+def get_forecast_state():
+    """
+    Return the parsed dataset and fitted forecast table, building them on first use.
+    The result is persisted to a sidecar keyed by the workbook's hash, so later
+    cold starts skip both the Excel parsing and the fitting.
+    """
+    global _forecast_state
+    if _forecast_state is None:
+        with _forecast_state_lock, span('model.load'):
+            if _forecast_state is None:
+                _forecast_state = load_or_build('peertopeer-forecast-v1', file_path, _build_forecast_state)
+    return _forecast_state
+
+def build_peer_to_prediction_columns(start_year=None, end_year=None):
+    """
+    Predict energy metrics for a given year range as typed column arrays.
 
     Parameters:
         start_year (int): The start year for predictions. Defaults to 2020 if null.
         end_year (int): The end year for predictions. Defaults to 2026 if null.
 
     Returns:
-        pd.DataFrame: A DataFrame containing predicted values for the selected metrics across the year range.
+        dict: 'Year', 'Place', 'Energy Type' and 'Predicted Value' numpy arrays of equal length.
     """
     if start_year is None:
         start_year = 2020
@@ -183,116 +344,65 @@ def get_peer_to_predictions(start_year=None, end_year=None):
         
     logger.debug(f"Generating predictions for year range: {start_year} to {end_year}")
     
-    all_predictions = []
-    
-    # Check if 'Visayas Total Power Generation (GWh)' exists in the DataFrame
-    visayas_gen_column = 'Visayas Total Power Generation (GWh)'
-    has_visayas_gen = visayas_gen_column in df.columns
-    if has_visayas_gen:
-        non_null_count = df[visayas_gen_column].count()
-        logger.debug(f"Column '{visayas_gen_column}' exists with {non_null_count} non-null values")
-    else:
-        logger.warning(f"Column '{visayas_gen_column}' not found in DataFrame")
-    
-    # Predict for each year in the range
-    for year in range(start_year, end_year + 1):
-        logger.debug(f"Processing predictions for year: {year}")
-        
-        # Create dictionaries to store Visayas power data
-        visayas_power_gen_dict = {}
-        visayas_consumption_dict = {}
-        
-        # Predict Visayas Total Power Generation for the specified year
-        if has_visayas_gen and non_null_count > 0:
-            try:
-                future_years, visayas_power_gen_predictions = predict_future(df, visayas_gen_column, target_year=year)
-                visayas_power_gen_dict = dict(zip(future_years, visayas_power_gen_predictions))
-            except Exception as e:
-                logger.error(f"Error predicting Visayas Total Power Generation for year {year}: {e}")
-        
-        # Predict Visayas Total Power Consumption for the specified year
-        visayas_consumption_column = 'Visayas Total Power Consumption (GWh)'
-        if visayas_consumption_column in df.columns:
-            try:
-                future_years, visayas_consumption_predictions = predict_future(df, visayas_consumption_column, target_year=year)
-                visayas_consumption_dict = dict(zip(future_years, visayas_consumption_predictions))
-            except Exception as e:
-                logger.error(f"Error predicting Visayas Total Power Consumption for year {year}: {e}")
-        else:
-            logger.warning(f"Column '{visayas_consumption_column}' not found in DataFrame")
+    state = get_forecast_state()
+    forecast_index = state['forecast_index']
+    layout_sources = state['layout_sources']
+    layout_is_consumption = state['layout_is_consumption']
     
-        # Iterate over each subgrid (place)
-        for place, df_place in subgrid_data.items():
-            logger.debug(f"Processing data for {place} for year {year}")
+    # Read every year off the precomputed forecast table in one pass
+    with span('forecast'):
+        years = np.arange(start_year, end_year + 1)
+        forecast = forecast_from_table(state['forecast_table'], years)
+        values = forecast[:, layout_sources]
     
-            # Check if the required columns exist in the DataFrame
-            if 'Total Power Generation (GWh)' in df_place.columns:
-                try:
-                    # Predict the place's total power generation
-                    future_years, power_generation_predictions = predict_future(df_place, 'Total Power Generation (GWh)', target_year=year)
-                    
-                    # Only add predictions for the current year we're processing
-                    for i, yr in enumerate(future_years):
-                        if yr == year:
-                            logger.debug(f"Predicted Power Generation for {place} in {year}: {power_generation_predictions[i]}")
-                            
-                            # Add to predictions
-                            predictions_df = pd.DataFrame({
-                                'Year': [year],
-                                'Place': [place],
-                                'Energy Type': ['Total Power Generation (GWh)'],
-                                'Predicted Value': [power_generation_predictions[i]]
-                            })
-                            all_predictions.append(predictions_df)
-                            
-                            # Calculate and add consumption prediction
-                            if yr in visayas_power_gen_dict and yr in visayas_consumption_dict:
-                                try:
-                                    visayas_power_gen = visayas_power_gen_dict.get(yr)
-                                    visayas_consumption = visayas_consumption_dict.get(yr)
-                                    
-                                    if visayas_power_gen != 0:  # Prevent division by zero
-                                        # Calculate ratio and consumption
-                                        ratio = power_generation_predictions[i] / visayas_power_gen
-                                        place_consumption = ratio * visayas_consumption
-                                        
-                                        predictions_df_consumption = pd.DataFrame({
-                                            'Year': [year],
-                                            'Place': [place],
-                                            'Energy Type': [f'{place} Estimated Consumption (GWh)'],
-                                            'Predicted Value': [place_consumption]
-                                        })
-                                        all_predictions.append(predictions_df_consumption)
-                                except Exception as e:
-                                    logger.error(f"Error calculating consumption for {place} in year {year}: {e}")
-                except Exception as e:
-                    logger.error(f"Error predicting Total Power Generation for {place} in year {year}: {e}")
-            else:
-                logger.warning(f"Column 'Total Power Generation (GWh)' not found for {place}")
+    # Place consumption is its share of Visayas generation applied to Visayas consumption
+    keep = ~np.broadcast_to(layout_is_consumption, values.shape)
+    if visayas_gen_column in forecast_index and visayas_consumption_column in forecast_index:
+        visayas_power_gen = forecast[:, [forecast_index[visayas_gen_column]]]
+        visayas_consumption = forecast[:, [forecast_index[visayas_consumption_column]]]
+        has_generation = visayas_power_gen != 0  # Prevent division by zero
+        ratio = values / np.where(has_generation, visayas_power_gen, 1.0)
+        values = np.where(layout_is_consumption, ratio * visayas_consumption, values)
+        keep = keep | (layout_is_consumption & has_generation)
     
-            # Predict future values for each metric
-            for metric in metrics:
-                if metric in df_place.columns:
-                    try:
-                        future_years, predictions = predict_future(df_place, metric, target_year=year)
-                        
-                        # Only add prediction for the current year
-                        for i, yr in enumerate(future_years):
-                            if yr == year:
-                                predictions_df = pd.DataFrame({
-                                    'Year': [year],
-                                    'Place': [place],
-                                    'Energy Type': [metric],
-                                    'Predicted Value': [predictions[i]]
-                                })
-                                all_predictions.append(predictions_df)
-                    except Exception as e:
-                        logger.error(f"Error predicting {metric} for {place} in year {year}: {e}")
-    
-    # Combine all predictions into a single DataFrame
-    if all_predictions:
-        all_predictions_df = pd.concat(all_predictions, ignore_index=True)
-        return all_predictions_df
-    else:
+    # Flatten year-major into one row per kept prediction
+    keep = keep.ravel()
+    return {
+        'Year': np.repeat(years, len(layout_sources))[keep],
+        'Place': np.tile(state['layout_places'], len(years))[keep],
+        'Energy Type': np.tile(state['layout_energy_types'], len(years))[keep],
+        'Predicted Value': values.ravel()[keep]
+    }
+
+def get_peer_to_prediction_records(start_year=None, end_year=None):
+    """
+    Predict energy metrics for a given year range as JSON-ready records,
+    without building an intermediate DataFrame.
+
+    Returns:
+        list: One dict per prediction with Year, Place, Energy Type and Predicted Value.
+    """
+    columns = build_peer_to_prediction_columns(start_year, end_year)
+    if not len(columns['Year']):
+        logger.warning("No predictions generated for the specified year range.")
+    names = list(columns)
+    with span('serialize'):
+        return [dict(zip(names, row)) for row in zip(*(columns[name].tolist() for name in names))]
+
+# Function to get predictions based on energy type and year range
+def get_peer_to_predictions(start_year=None, end_year=None):
+    """
+    Predict energy metrics for a given year range.
+
+    Parameters:
+        start_year (int): The start year for predictions. Defaults to 2020 if null.
+        end_year (int): The end year for predictions. Defaults to 2026 if null.
+
+    Returns:
+        pd.DataFrame: A DataFrame containing predicted values for the selected metrics across the year range.
+    """
+    columns = build_peer_to_prediction_columns(start_year, end_year)
+    if not len(columns['Year']):
         logger.warning("No predictions generated for the specified year range.")
-        return pd.DataFrame()
\ No newline at end of file
+        return pd.DataFrame()
+    return pd.DataFrame(columns)
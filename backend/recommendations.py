@@ -1,53 +1,91 @@
 import numpy as np
 import pandas as pd
-from scipy.optimize import curve_fit
-from sklearn.preprocessing import PolynomialFeatures
-from sklearn.linear_model import LinearRegression
 import os
-import time
 import logging
-from pymongo import MongoClient
-from pymongo.errors import ConnectionFailure
-import json
-from django.views.decorators.csrf import csrf_exempt
+import threading
+from mongodb import get_collection, get_async_collection
+from mongodb import get_data_version, bump_data_version, get_data_version_async, bump_data_version_async
+from sidecar_cache import load_or_build
+from excel_cache import read_excel_cached
+from tracing import span, traced
+from response_cache import ResponseCache
 
-# Load dataset
+# Dataset location; models are fitted lazily on first use
 script_dir = os.path.dirname(os.path.abspath(__file__))
 file_path = os.path.join(script_dir, 'peertopeer.xlsx')
-df = pd.read_excel(file_path)
 
-# Prepare data
-X = df[['Year']].values.flatten()  # Convert to 1D array
-y_solar_cost = df['Solar Cost (PHP/W)'] * 1000  # Convert to PHP/kW
-y_meralco_rate = df['MERALCO Rate (PHP/kWh)']
+# Define the exponential decay function
+def exp_decay(x, a, b, c, x_min):
+    return a * np.exp(-b * (x - x_min)) + c  # Shift x to prevent large exponent values
+
+def _fit_solar_models(source_path):
+    """
+    Fit the solar cost and MERALCO rate models from the peer-to-peer workbook.
+    Only plain parameters are returned, so serving them never imports scikit-learn.
+    """
+    from scipy.optimize import curve_fit
+    from sklearn.preprocessing import PolynomialFeatures
+    from sklearn.linear_model import LinearRegression
 
-# --- Step 1: Fit Exponential Decay Model to Solar Cost ---
+    df = read_excel_cached(source_path)
 
-# Define the exponential decay function
-def exp_decay(x, a, b, c):
-    return a * np.exp(-b * (x - X.min())) + c  # Shift x to prevent large exponent values
+    # Prepare data
+    X = df[['Year']].values.flatten()  # Convert to 1D array
+    y_solar_cost = df['Solar Cost (PHP/W)'] * 1000  # Convert to PHP/kW
+    y_meralco_rate = df['MERALCO Rate (PHP/kWh)']
+    x_min = X.min()
+
+    # --- Step 1: Fit Exponential Decay Model to Solar Cost ---
+    popt, _ = curve_fit(lambda x, a, b, c: exp_decay(x, a, b, c, x_min), X, y_solar_cost, maxfev=5000)
+
+    # --- Step 2: Fit Polynomial Regression Model to MERALCO Rate ---
+    poly = PolynomialFeatures(degree=2)  # Quadratic model for MERALCO rates
+    X_poly = poly.fit_transform(X.reshape(-1, 1))  # Transform X for polynomial regression
+
+    # Train Polynomial Regression for MERALCO Rate
+    model_meralco = LinearRegression()
+    model_meralco.fit(X_poly, y_meralco_rate)
+
+    return {
+        'x_min': x_min,
+        'popt': popt,
+        # Weights of the quadratic features [1, year, year^2]
+        'meralco_coef': np.asarray(model_meralco.coef_, dtype=float),
+        'meralco_intercept': float(model_meralco.intercept_)
+    }
 
-# Fit the exponential model to the data
-popt, _ = curve_fit(exp_decay, X, y_solar_cost, maxfev=5000)
+_solar_models = None
+_solar_models_lock = threading.Lock()
+
+def get_solar_models():
+    """
+    Return the fitted solar cost and MERALCO rate models, fitting them on first use.
+    The fitted parameters are persisted to a sidecar keyed by the workbook's
+    hash, so later cold starts skip both the Excel parsing and the curve fit.
+    """
+    global _solar_models
+    if _solar_models is None:
+        with _solar_models_lock, span('model.load'):
+            if _solar_models is None:
+                _solar_models = load_or_build('recommendations-models-v2', file_path, _fit_solar_models)
+    return _solar_models
 
 # Function to predict solar cost using the fitted model
 def predict_solar_cost(year):
-    return max(exp_decay(year, *popt), 20000)  # Keep above PHP 10,000 per kW
+    models = get_solar_models()
+    return max(exp_decay(year, *models['popt'], models['x_min']), 20000)  # Keep above PHP 10,000 per kW
 
-# --- Step 2: Fit Polynomial Regression Model to MERALCO Rate ---
-poly = PolynomialFeatures(degree=2)  # Quadratic model for MERALCO rates
-X_poly = poly.fit_transform(X.reshape(-1, 1))  # Transform X for polynomial regression
-
-# Train Polynomial Regression for MERALCO Rate
-model_meralco = LinearRegression()
-model_meralco.fit(X_poly, y_meralco_rate)
+# Function to predict the MERALCO rate using the fitted quadratic
+def predict_meralco_rate(year):
+    models = get_solar_models()
+    year_poly = np.array([[1.0, year, year ** 2]], dtype=float)  # Same features as PolynomialFeatures(degree=2)
+    return max((year_poly @ models['meralco_coef'] + models['meralco_intercept'])[0], 0)
 
 # --- Step 3: Prediction Function ---
+@traced('forecast')
 def predict_solar_capacity_and_roi(budget, year):
-    year_poly = poly.transform(np.array([[year]]))  # Transform year for polynomial model
-
     predicted_solar_cost = predict_solar_cost(year)  # Exponential decay for solar cost
-    predicted_meralco_rate = max(model_meralco.predict(year_poly)[0], 0)  # Polynomial regression for MERALCO rate
+    predicted_meralco_rate = predict_meralco_rate(year)  # Polynomial regression for MERALCO rate
 
     # Calculate installable solar capacity
     capacity_kw = budget / predicted_solar_cost if predicted_solar_cost > 0 else 0
@@ -83,6 +121,117 @@ def predict_solar_capacity_and_roi(budget, year):
         'roi_years': roi_years
     }
 
+# --- Vectorized variants for evaluating many (year, budget) pairs at once ---
+
+# Serialized ROI grid responses keyed by grid definition; bounded by total body size
+roi_grid_cache = ResponseCache()
+
+def predict_solar_cost_batch(years):
+    """
+    Predict the solar cost in PHP/kW for an array of years, floored at PHP 20,000 per kW.
+    """
+    models = get_solar_models()
+    years = np.asarray(years, dtype=float)
+    return np.maximum(exp_decay(years, *models['popt'], models['x_min']), 20000)
+
+def predict_meralco_rate_batch(years):
+    """
+    Predict the MERALCO rate in PHP/kWh for an array of years from the quadratic model.
+    """
+    models = get_solar_models()
+    years = np.asarray(years, dtype=float)
+    # The polynomial features are [1, year, year^2]; apply the fitted weights directly
+    weights = models['meralco_coef']
+    rate = models['meralco_intercept'] + weights[0] + weights[1] * years + weights[2] * years ** 2
+    return np.maximum(rate, 0)
+
+@traced('forecast')
+def predict_solar_capacity_and_roi_batch(budgets, years, avg_daily_production_kwh=4):
+    """
+    Vectorized predict_solar_capacity_and_roi over element-wise (budget, year) pairs.
+
+    Parameters:
+        budgets (array-like): Budgets in PHP.
+        years (array-like): Investment years, broadcast against `budgets`.
+        avg_daily_production_kwh (float or array-like): Average daily solar production per kW.
+
+    Returns:
+        dict: Arrays keyed like the single-pair result. roi_years is inf where there are no savings.
+    """
+    budgets, years = np.broadcast_arrays(np.asarray(budgets, dtype=float), np.asarray(years, dtype=float))
+
+    predicted_solar_cost = predict_solar_cost_batch(years)
+    predicted_meralco_rate = predict_meralco_rate_batch(years)
+
+    capacity_kw = budgets / predicted_solar_cost
+    yearly_energy_production = capacity_kw * np.asarray(avg_daily_production_kwh, dtype=float) * 365
+    yearly_savings = yearly_energy_production * predicted_meralco_rate
+    with np.errstate(divide='ignore', invalid='ignore'):
+        roi_years = np.where(yearly_savings > 0, budgets / yearly_savings, np.inf)
+
+    return {
+        'year': years,
+        'budget': budgets,
+        'predicted_solar_cost': predicted_solar_cost,
+        'predicted_meralco_rate': predicted_meralco_rate,
+        'capacity_kw': capacity_kw,
+        'yearly_energy_production': yearly_energy_production,
+        'yearly_savings': yearly_savings,
+        'roi_years': roi_years
+    }
+
+def get_solar_recommendations_batch(years, budgets):
+    """
+    Get solar recommendations for many (year, budget) pairs in one pass.
+
+    Parameters:
+        years (list): Investment years.
+        budgets (list): Budgets in PHP, paired element-wise with `years`.
+
+    Returns:
+        list: One dict per pair. An infinite payback period is reported as None.
+    """
+    result = predict_solar_capacity_and_roi_batch(budgets, years)
+    result['year'] = result['year'].astype(int)
+    result['roi_years'] = np.where(np.isfinite(result['roi_years']), result['roi_years'], np.nan)
+    names = list(result)
+    return [
+        {name: (None if isinstance(value, float) and np.isnan(value) else value) for name, value in zip(names, row)}
+        for row in zip(*(result[name].tolist() for name in names))
+    ]
+
+def get_roi_sensitivity_grid(years, budgets, daily_productions):
+    """
+    Evaluate payback years and yearly savings over a full year x budget x daily-production grid.
+
+    Parameters:
+        years (tuple): Investment years (first grid axis).
+        budgets (tuple): Budgets in PHP (second grid axis).
+        daily_productions (tuple): Average daily solar production per kW in kWh (third grid axis).
+
+    Returns:
+        dict: The grid axes, per-year solar cost and MERALCO rate, and nested
+        [year][budget][production] lists of payback years (None when there are
+        no savings) and yearly savings.
+    """
+    year_axis = np.asarray(years, dtype=float)[:, None, None]
+    budget_axis = np.asarray(budgets, dtype=float)[None, :, None]
+    production_axis = np.asarray(daily_productions, dtype=float)[None, None, :]
+
+    result = predict_solar_capacity_and_roi_batch(budget_axis, year_axis, avg_daily_production_kwh=production_axis)
+    payback_years = np.broadcast_to(result['roi_years'], (len(years), len(budgets), len(daily_productions)))
+    payback_years = np.where(np.isfinite(payback_years), payback_years, np.nan)
+
+    return {
+        'years': list(years),
+        'budgets': list(budgets),
+        'daily_production_kwh': list(daily_productions),
+        'predicted_solar_cost': predict_solar_cost_batch(years).tolist(),
+        'predicted_meralco_rate': predict_meralco_rate_batch(years).tolist(),
+        'payback_years': [[[None if np.isnan(v) else v for v in row] for row in plane] for plane in payback_years.tolist()],
+        'yearly_savings': np.broadcast_to(result['yearly_savings'], payback_years.shape).tolist()
+    }
+
 def get_solar_recommendations(year, budget):
     """
     Get solar recommendations based on the given year and budget.
@@ -134,109 +283,43 @@ logging.basicConfig(level=logging.DEBUG)
 logger = logging.getLogger(__name__)
 
 # MongoDB connection details
-MONGO_URL = os.getenv("MONGO_URL")  # Load MongoDB URI from environment variables
-DATABASE_NAME = "ecopulse"  # Database name
 RECOMMENDATION_COLLECTION = "recommendation"  # Collection name for recommendations
 
-def connect_to_mongodb_recommendation(retries=3, delay=5):
+def connect_to_mongodb_recommendation():
     """
-    Connect to MongoDB Atlas and return the recommendations collection.
-    Retries the connection in case of failure.
+    Return the recommendations collection from the shared, pooled MongoDB client.
     
-    Parameters:
-        retries (int): Number of connection attempts to make
-        delay (int): Seconds to wait between retries
-        
     Returns:
         pymongo.collection.Collection: The MongoDB collection for recommendations
     """
-    for attempt in range(retries):
-        try:
-            client = MongoClient(MONGO_URL, serverSelectionTimeoutMS=5000)
-            db = client[DATABASE_NAME]
-            collection = db[RECOMMENDATION_COLLECTION]
-            # Attempt to ping the server to check the connection
-            client.admin.command('ping')
-            logger.debug("Connected to MongoDB Atlas recommendations successfully.")
-            return collection
-        except ConnectionFailure as e:
-            logger.error(f"Error connecting to MongoDB recommendations (attempt {attempt + 1}): {e}")
-            if attempt < retries - 1:
-                time.sleep(delay)
-            else:
-                raise
-
-@csrf_exempt
-def recommendation_records(request):
-    """
-    Handle operations for recommendation records.
-    
-    GET: Fetch recommendation records, optionally filtered by year
-    POST: Create a new recommendation record
-    
-    Parameters:
-        request (HttpRequest): The Django HTTP request object
-        
-    Returns:
-        JsonResponse: JSON response with operation status and data
-    """
-    try:
-        collection = connect_to_mongodb_recommendation()
-        
-        if request.method == 'GET':
-            # Extract parameters for potential filtering
-            year = request.GET.get('year')
-            
-            # Build query
-            query = {}
-            if year:
-                query["Year"] = int(year)
-            
-            # Fetch records
-            records_cursor = collection.find(query)
-            records = []
-            
-            # Process each record
-            for record in records_cursor:
-                # Convert ObjectId to string for JSON serialization
-                record['_id'] = str(record['_id'])
-                records.append(record)
-            
-            return JsonResponse({
-                'status': 'success',
-                'records': records
-            })
-            
-        elif request.method == 'POST':
-            # Parse request body
-            data = json.loads(request.body)
-            
-            # Ensure Year is stored as integer
-            if 'Year' in data:
-                data['Year'] = int(data['Year'])
-                
-            # Insert new record
-            result = collection.insert_one(data)
-            
-            # Return success response with new record ID
-            return JsonResponse({
-                'status': 'success',
-                'message': 'Recommendation created successfully',
-                'id': str(result.inserted_id)
-            })
-            
-        else:
-            return JsonResponse({
-                'status': 'error',
-                'message': 'Method not allowed'
-            }, status=405)
-            
-    except Exception as e:
-        # Log the error
-        logger.error(f"Error in recommendation_records: {str(e)}")
-        
-        # Return error response
-        return JsonResponse({
-            'status': 'error',
-            'message': str(e)
-        }, status=500)
\ No newline at end of file
+    return get_collection(RECOMMENDATION_COLLECTION)
+
+def connect_to_mongodb_recommendation_async():
+    """
+    Return the recommendations collection from the async client of the running event loop.
+    """
+    return get_async_collection(RECOMMENDATION_COLLECTION)
+
+def recommendation_data_version():
+    """
+    Return the recommendation data version, which changes after every write made through the API.
+    """
+    return get_data_version(RECOMMENDATION_COLLECTION)
+
+async def recommendation_data_version_async():
+    """
+    Async counterpart of recommendation_data_version.
+    """
+    return await get_data_version_async(RECOMMENDATION_COLLECTION)
+
+def notify_recommendation_changed():
+    """
+    Bump the recommendation data version after a write so cached copies revalidate.
+    """
+    bump_data_version(RECOMMENDATION_COLLECTION)
+
+async def notify_recommendation_changed_async():
+    """
+    Async counterpart of notify_recommendation_changed.
+    """
+    await bump_data_version_async(RECOMMENDATION_COLLECTION)
@@ -0,0 +1,87 @@
+import os
+import time
+import threading
+from collections import OrderedDict
+
+# Limits of the forecast response cache, tunable per deployment
+FORECAST_CACHE_MAX_ENTRIES = int(os.getenv("FORECAST_CACHE_MAX_ENTRIES", "256"))
+FORECAST_CACHE_MAX_BYTES = int(os.getenv("FORECAST_CACHE_MAX_BYTES", str(32 * 1024 * 1024)))
+FORECAST_CACHE_TTL_SECONDS = float(os.getenv("FORECAST_CACHE_TTL_SECONDS", "600"))
+
+class ResponseCache:
+    """
+    Thread-safe LRU cache of serialized response bodies with a TTL.
+
+    Memory is bounded both by entry count and by the total size of the cached
+    bodies; the least recently used entries are evicted first. Keys should
+    include everything the body depends on, such as the data version.
+    """
+
+    def __init__(self, max_entries=FORECAST_CACHE_MAX_ENTRIES, max_bytes=FORECAST_CACHE_MAX_BYTES, ttl=FORECAST_CACHE_TTL_SECONDS, clock=time.monotonic):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._clock = clock
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        """
+        Return the cached body for `key`, or None when it is missing or expired.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] > self._clock():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            if entry is not None:
+                self._remove(key)
+            self.misses += 1
+            return None
+
+    def set(self, key, body):
+        """
+        Cache a body, evicting the least recently used entries to stay within bounds.
+        Bodies larger than the whole cache are not stored.
+        """
+        if len(body) > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (body, self._clock() + self.ttl)
+            self._bytes += len(body)
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def _remove(self, key):
+        body, _ = self._entries.pop(key)
+        self._bytes -= len(body)
+
+    def clear(self):
+        """
+        Drop every cached body, e.g. after the underlying data changed.
+        """
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self):
+        """
+        Return the hit/miss/eviction counters, hit ratio and current size.
+        """
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'hit_ratio': self.hits / lookups if lookups else 0.0,
+            'entries': len(self._entries),
+            'bytes': self._bytes
+        }
@@ -0,0 +1,93 @@
+import os
+import sys
+import glob
+import pickle
+import hashlib
+import tempfile
+import logging
+import platform
+from importlib import metadata
+from model_registry import file_digest
+
+# Configure the logger
+logger = logging.getLogger(__name__)
+
+# Derived artifacts are written next to the code unless overridden per deployment
+CACHE_DIR = os.getenv(
+    "ECOPULSE_CACHE_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), '.cache')
+)
+
+# Libraries whose upgrades can change or break pickled artifacts
+SIDECAR_LIBRARIES = ('numpy', 'pandas', 'scipy', 'scikit-learn')
+
+def _library_versions():
+    versions = [f'python-{platform.python_version()}']
+    for library in SIDECAR_LIBRARIES:
+        try:
+            versions.append(f'{library}-{metadata.version(library)}')
+        except metadata.PackageNotFoundError:
+            versions.append(f'{library}-missing')
+    return versions
+
+def sidecar_key(source_path, builder):
+    """
+    Return the cache key of an artifact: a digest of the source file, the source
+    code of the builder's module and the versions of the libraries it is pickled with.
+    Editing the builder or upgrading a library therefore never loads a stale sidecar.
+    """
+    digest = hashlib.sha256()
+    digest.update(file_digest(source_path).encode())
+    module_path = getattr(sys.modules.get(builder.__module__), '__file__', None)
+    if module_path and os.path.isfile(module_path):
+        digest.update(file_digest(module_path).encode())
+    digest.update('\0'.join(_library_versions()).encode())
+    return digest.hexdigest()[:16]
+
+def load_or_build(name, source_path, builder):
+    """
+    Return the artifact derived from `source_path`, building it only once per source version.
+
+    The result of `builder(source_path)` is pickled to a sidecar file keyed by
+    sidecar_key, so later processes load it instead of redoing the work.
+    Sidecars for older versions of the same source are removed.
+
+    Parameters:
+        name (str): Artifact name.
+        source_path (str): The file the artifact is derived from.
+        builder (callable): Function taking `source_path` and returning a picklable value.
+    """
+    sidecar_path = os.path.join(CACHE_DIR, f'{name}-{sidecar_key(source_path, builder)}.pkl')
+
+    try:
+        with open(sidecar_path, 'rb') as f:
+            value = pickle.load(f)
+        logger.debug(f"Loaded {name} from sidecar {sidecar_path}")
+        return value
+    except FileNotFoundError:
+        pass
+    except Exception as e:
+        logger.warning(f"Ignoring unreadable sidecar {sidecar_path}: {e}")
+
+    value = builder(source_path)
+
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        # Write to a temporary file first so readers never see a partial sidecar
+        fd, tmp_path = tempfile.mkstemp(dir=CACHE_DIR, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, sidecar_path)
+        except Exception:
+            os.remove(tmp_path)
+            raise
+        for stale_path in glob.glob(os.path.join(CACHE_DIR, f'{glob.escape(name)}-*.pkl')):
+            if stale_path != sidecar_path:
+                os.remove(stale_path)
+        logger.debug(f"Wrote {name} sidecar {sidecar_path}")
+    except Exception as e:
+        # A read-only deployment or an unpicklable value still works, it just rebuilds on every cold start
+        logger.warning(f"Could not write sidecar for {name}: {e}")
+
+    return value
@@ -0,0 +1,79 @@
+import time
+import functools
+import contextvars
+from contextlib import contextmanager
+
+# Trace of the request currently being handled, if any
+_current_trace = contextvars.ContextVar('ecopulse_trace', default=None)
+
+class Trace:
+    """
+    Timings collected while handling one request.
+    Spans with the same name are summed, so loops report a single total.
+    """
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.spans = {}
+
+    def add(self, name, duration):
+        total, count = self.spans.get(name, (0.0, 0))
+        self.spans[name] = (total + duration, count + 1)
+
+    def elapsed_ms(self):
+        return (time.perf_counter() - self.started) * 1000
+
+    def as_dict(self):
+        """
+        Return {span name: {'ms': total milliseconds, 'count': calls}}.
+        """
+        return {name: {'ms': round(total * 1000, 3), 'count': count} for name, (total, count) in self.spans.items()}
+
+    def server_timing(self):
+        """
+        Format the spans as a Server-Timing header value.
+        """
+        entries = [f'{name};dur={total * 1000:.2f}' for name, (total, count) in self.spans.items()]
+        entries.append(f'total;dur={self.elapsed_ms():.2f}')
+        return ', '.join(entries)
+
+def start_trace():
+    """
+    Begin a trace for the current request and return (trace, token) for end_trace.
+    """
+    trace = Trace()
+    return trace, _current_trace.set(trace)
+
+def end_trace(token):
+    _current_trace.reset(token)
+
+def current_trace():
+    return _current_trace.get()
+
+@contextmanager
+def span(name):
+    """
+    Time the enclosed block and record it on the current request's trace.
+    Outside a traced request this does nothing.
+    """
+    trace = _current_trace.get()
+    if trace is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        trace.add(name, time.perf_counter() - started)
+
+def traced(name):
+    """
+    Decorator form of span() for whole functions.
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator